@@ -113,13 +113,67 @@ DATABASES = {
     }
 }
 
+# Rendered graph images keyed by a fingerprint of their data and the state of async
+# graph jobs. Every web worker must share it for jobs to be polled from any of them,
+# so memcached is used when GRAPH_CACHE_LOCATION is set. Otherwise it falls back to
+# a per process cache culling the least recently used images at MAX_ENTRIES.
+GRAPH_CACHE_LOCATION = os.environ.get("GRAPH_CACHE_LOCATION")
+if GRAPH_CACHE_LOCATION:
+    GRAPH_CACHE = {
+        "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+        "LOCATION": GRAPH_CACHE_LOCATION,
+        "KEY_PREFIX": "graphs",
+    }
+else:
+    GRAPH_CACHE = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "graphs",
+        "OPTIONS": {"MAX_ENTRIES": 500, "CULL_FREQUENCY": 10},
+    }
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         "LOCATION": "unique-snowflake",
-    }
+    },
+    "graphs": {**GRAPH_CACHE, "TIMEOUT": 60 * 60 * 24},
+    # Nutritionix search results and item details, least recently used responses
+    # are culled once MAX_ENTRIES is reached
+    "nutritionix": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "nutritionix",
+        "TIMEOUT": 60 * 60 * 6,
+        "OPTIONS": {"MAX_ENTRIES": 2000, "CULL_FREQUENCY": 10},
+    },
+    # In-progress workout sessions, kept apart from the default cache so other
+    # cached data can't cull a session's sets before it is committed
+    "workout_drafts": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "workout_drafts",
+        "TIMEOUT": 60 * 60 * 24,
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
 }
 
+GRAPH_CACHE_ALIAS = "graphs"
+GRAPH_CACHE_MAX_ITEM_SIZE = 512 * 1024  # Images larger than this are not cached
+GRAPH_JOB_TIMEOUT = 60 * 5  # Seconds a job's state and uncached result are kept
+GRAPH_DPI = 80  # PNG and WebP graph resolution, a 10x6in graph renders at 800x480
+# Worker processes rendering graphs requested with ?format=async
+GRAPH_RENDER_WORKERS = int(os.environ.get("GRAPH_RENDER_WORKERS", 2))
+
+WORKOUT_DRAFT_CACHE_ALIAS = "workout_drafts"
+
+SEARCH_MIN_QUERY_LENGTH = 3  # Shorter type-ahead queries are not searched
+SEARCH_CACHE_TIMEOUT = 60 * 5  # Type-ahead results are reused for this many seconds
+
+NUTRITIONIX_URL = os.environ.get(
+    "NUTRITIONIX_URL", "https://trackapi.nutritionix.com/v2/"
+)
+NUTRITIONIX_CACHE_ALIAS = "nutritionix"
+NUTRITIONIX_TIMEOUT = (3.05, 5)  # Connect and read timeouts in seconds
+NUTRITIONIX_POOL_SIZE = 10  # Keep-alive connections kept open to the API
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -28,5 +28,6 @@ urlpatterns = [
     path("cardio/", include("cardio.urls")),
     path("nutrition/", include("nutrition_tracker.urls")),
     path("stats/", include("stats.urls")),
+    path("graphs/", include("common.urls")),
     path("api/", include(workout_api + log_api)),
 ]
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from cardio.services import rebuild_cardio_rollups
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the daily cardio rollups from the cardio logs of every user"
+
+    def handle(self, *args, **options):
+        total = 0
+        for user in User.objects.filter(cardiolog__isnull=False).distinct():
+            total += rebuild_cardio_rollups(user)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} daily cardio rollups"))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from cardio.services import find_cardio_rollup_mismatches, rebuild_cardio_rollups
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Compares the daily cardio rollups against the cardio logs they summarize"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rebuild the rollups of users with mismatched days",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(cardiolog__isnull=False) | Q(cardio_rollups__isnull=False)
+        ).distinct()
+
+        mismatched_users = 0
+        for user in users:
+            mismatches = find_cardio_rollup_mismatches(user)
+            if not mismatches:
+                continue
+
+            mismatched_users += 1
+            days = ", ".join(day.isoformat() for day in mismatches)
+            self.stdout.write(f"{user.username}: {days}")
+            if options["fix"]:
+                rebuild_cardio_rollups(user)
+
+        if mismatched_users == 0:
+            self.stdout.write(self.style.SUCCESS("Daily cardio rollups are consistent"))
+        elif options["fix"]:
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt rollups for {mismatched_users} users")
+            )
+        else:
+            self.stdout.write(
+                self.style.WARNING(f"Found mismatches for {mismatched_users} users")
+            )
@@ -0,0 +1,75 @@
+# Generated by Django 4.2 on 2026-10-18 03:12
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def backfill_cardio_rollups(apps, schema_editor):
+    """Builds the rollups of every existing cardio log, as rebuild_cardio_rollups does"""
+    CardioLog = apps.get_model("log", "CardioLog")
+    CardioDailyRollup = apps.get_model("cardio", "CardioDailyRollup")
+
+    daily_totals = (
+        CardioLog.objects.annotate(date=TruncDate("datetime"))
+        .values("user_id", "date")
+        .annotate(
+            total_distance=Sum("distance"),
+            total_duration=Sum("duration"),
+            count=Count("id"),
+        )
+        .order_by("user_id", "date")
+    )
+    rollups = []
+    for totals in daily_totals.iterator():
+        rollups.append(CardioDailyRollup(**totals))
+        if len(rollups) == 1000:
+            CardioDailyRollup.objects.bulk_create(rollups)
+            rollups = []
+    CardioDailyRollup.objects.bulk_create(rollups)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("log", "0005_alter_fooditem_carbs_alter_fooditem_fat_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CardioDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("total_distance", models.FloatField(default=0)),
+                ("total_duration", models.DurationField(default=datetime.timedelta)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cardio_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "date")},
+            },
+        ),
+        migrations.RunPython(backfill_cardio_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from datetime import timedelta
+from django.db import models
+from users.models import User
+
+
+class CardioDailyRollup(models.Model):
+    """Per user daily totals of CardioLog, kept in sync by signals in cardio.signals"""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="cardio_rollups"
+    )
+    date = models.DateField()
+    total_distance = models.FloatField(default=0)
+    total_duration = models.DurationField(default=timedelta)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "date")
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}"
@@ -1,10 +1,11 @@
 from django.db.models.functions import TruncDay
-from django.db.models import Sum
+from django.db.models import Sum, Count, F, Q
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
 from log.models import CardioLog
 from common.common_utils import Graph
 from users.models import UserSettings
+from .models import CardioDailyRollup
 from .utils import (
     format_duration,
     get_calories_burned,
@@ -12,8 +13,9 @@ from .utils import (
 )
 
 
-def get_cardio_log_averages(log, user):
-    user_settings = UserSettings.get_user_settings(user.id)
+def get_cardio_log_averages(log, user, user_settings=None):
+    if user_settings is None:
+        user_settings = UserSettings.get_user_settings(user.id)
     distance_unit = user_settings.distance_unit
     body_weight = user_settings.body_weight
     distance = log["total_distance"]
@@ -43,91 +45,159 @@ def get_cardio_log_averages(log, user):
     return log
 
 
-def get_cardio_log_summaries(user, selected_range=None):
+def get_cardio_log_summaries(
+    user, selected_range=None, graph_format=Graph.IMAGE_FORMAT, image_type=Graph.PNG
+):
     # Get start dates for each period in selected range
     today = timezone.now().astimezone(timezone.get_current_timezone()).date()
     start_dates = get_start_dates(today, selected_range)
 
-    # Get cardio logs and group them by day
-    grouped_cardio_logs = get_cardio_logs_grouped_by_day(
-        user, start_dates["extended_start_date"], today
-    )
-
-    # Aggregate logs for each period and get graph data for selected range
-    aggregated_logs, graph_data = aggregate_cardio_logs(
-        grouped_cardio_logs, start_dates, selected_range
-    )
+    # Aggregate each period in the database and get graph data for selected range
+    aggregated_logs = aggregate_cardio_logs(user, start_dates, today)
 
     if selected_range == "week":
-        graph = Graph(
-            graph_data, "Distance", "bar", start_dates["extended_start_date"], today
-        )
+        graph_start = start_dates["extended_start_date"]
     else:
-        graph = Graph(graph_data, "Distance", "bar", start_dates["start_date"], today)
+        graph_start = start_dates["start_date"]
+    graph_data = get_cardio_graph_data(user, graph_start, today)
+    graph = Graph(graph_data, "Distance", "bar", graph_start, today, image_type)
 
+    user_settings = UserSettings.get_user_settings(user.id)
     return [
-        get_cardio_log_averages(log, user) for log in aggregated_logs
-    ], graph.plot_graph()
-
+        get_cardio_log_averages(log, user, user_settings) for log in aggregated_logs
+    ], graph.get_graph(graph_format)
 
-def get_cardio_logs_grouped_by_day(user, start, end):
-    # Get queryset of user logs for given range
-    cardio_logs = CardioLog.objects.filter(
-        user=user, datetime__date__range=[start, end]
-    )
 
+def group_cardio_logs_by_day(cardio_logs):
     # Group logs by day and sum the distance and duration for each day
     grouped_cardio_logs = (
         cardio_logs.annotate(day=TruncDay("datetime"))
         .values("day")
         .annotate(total_distance=Sum("distance"))
         .annotate(total_duration=Sum("duration"))
+        .annotate(count=Count("id"))
     ).order_by("day")
 
     return grouped_cardio_logs
 
 
-def aggregate_cardio_logs(cardio_logs, start_dates, selected_range):
-    current, previous, extended = (
-        {"total_distance": 0, "total_duration": 0, "count": 0} for _ in range(3)
+def get_cardio_rollups_grouped_by_day(user, start, end):
+    """Returns daily cardio totals for the given range, shaped like group_cardio_logs_by_day"""
+    return (
+        CardioDailyRollup.objects.filter(user=user, date__range=[start, end])
+        .values("total_distance", "total_duration", "count", day=F("date"))
+        .order_by("date")
     )
+
+
+def update_cardio_rollup(user_id, day):
+    """Recomputes a user's rollup for a single day from their cardio logs"""
+    totals = CardioLog.objects.filter(user_id=user_id, datetime__date=day).aggregate(
+        total_distance=Sum("distance"),
+        total_duration=Sum("duration"),
+        count=Count("id"),
+    )
+    if totals["count"] == 0:
+        CardioDailyRollup.objects.filter(user_id=user_id, date=day).delete()
+    else:
+        CardioDailyRollup.objects.update_or_create(
+            user_id=user_id, date=day, defaults=totals
+        )
+
+
+def rebuild_cardio_rollups(user):
+    """Replaces all of a user's rollups with totals computed from their cardio logs"""
+    grouped_cardio_logs = group_cardio_logs_by_day(CardioLog.objects.filter(user=user))
+    rollups = [
+        CardioDailyRollup(
+            user=user,
+            date=log["day"].date(),
+            total_distance=log["total_distance"],
+            total_duration=log["total_duration"],
+            count=log["count"],
+        )
+        for log in grouped_cardio_logs
+    ]
+
+    with transaction.atomic():
+        CardioDailyRollup.objects.filter(user=user).delete()
+        CardioDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+
+    return len(rollups)
+
+
+def find_cardio_rollup_mismatches(user):
+    """Returns the days where a user's rollups don't match their cardio logs"""
+
+    def totals(log):
+        return round(log["total_distance"], 6), log["total_duration"], log["count"]
+
+    expected = {
+        log["day"].date(): totals(log)
+        for log in group_cardio_logs_by_day(CardioLog.objects.filter(user=user))
+    }
+    actual = {
+        log["day"]: totals(log)
+        for log in CardioDailyRollup.objects.filter(user=user).values(
+            "total_distance", "total_duration", "count", day=F("date")
+        )
+    }
+
+    return sorted(
+        day
+        for day in expected.keys() | actual.keys()
+        if expected.get(day) != actual.get(day)
+    )
+
+
+def aggregate_cardio_logs(user, start_dates, end):
+    """
+    Returns totals for the current, previous and extended periods in a single query.
+
+    Each period counts the days with cardio logs, the extended period covers the
+    whole range and includes the current and previous periods.
+    """
+    periods = {
+        "current": Q(date__gte=start_dates["start_date"]),
+        "previous": Q(
+            date__gte=start_dates["previous_start_date"],
+            date__lt=start_dates["start_date"],
+        ),
+        "extended": None,
+    }
+
+    aggregates = {}
+    for period, condition in periods.items():
+        aggregates[f"{period}_distance"] = Sum("total_distance", filter=condition)
+        aggregates[f"{period}_duration"] = Sum("total_duration", filter=condition)
+        aggregates[f"{period}_count"] = Count("id", filter=condition)
+
+    totals = CardioDailyRollup.objects.filter(
+        user=user, date__range=[start_dates["extended_start_date"], end]
+    ).aggregate(**aggregates)
+
+    return [
+        {
+            "total_distance": totals[f"{period}_distance"] or 0,
+            "total_duration": (
+                totals[f"{period}_duration"].total_seconds()
+                if totals[f"{period}_duration"]
+                else 0
+            ),
+            "count": totals[f"{period}_count"],
+        }
+        for period in periods
+    ]
+
+
+def get_cardio_graph_data(user, start, end):
     graph_data = {
         "dates": [],
         "Distance": [],
     }
 
-    # Update log dictionaries for each time period
-    for log in cardio_logs:
-        date = log["day"].date()
-        if date >= start_dates["start_date"]:
-            update_log_dict_and_graph_data(current, graph_data, log, True)
-        # Only add all logs to graph data if selected range is week
-        elif date >= start_dates["previous_start_date"]:
-            update_log_dict_and_graph_data(
-                previous, graph_data, log, selected_range == "week"
-            )
-        else:
-            update_log_dict_and_graph_data(
-                extended, graph_data, log, selected_range == "week"
-            )
-
-    # Add current and previous logs to extended log to complete aggregate
-    extended["total_distance"] += current["total_distance"] + previous["total_distance"]
-    extended["total_duration"] += current["total_duration"] + previous["total_duration"]
-    extended["count"] += current["count"] + previous["count"]
-
-    return [current, previous, extended], graph_data
-
-
-def update_log_dict_and_graph_data(log_dict, graph_data, log, update_graph):
-    log_dict["total_distance"] += log["total_distance"]
-    log_dict["total_duration"] += (
-        log["total_duration"].total_seconds()
-        if isinstance(log["total_duration"], timedelta)
-        else log["total_duration"]  # Used for final extended aggregate
-    )
-    log_dict["count"] += 1
-
-    if update_graph and graph_data is not None:
-        graph_data["dates"].append(log["day"].date())
+    for log in get_cardio_rollups_grouped_by_day(user, start, end):
+        graph_data["dates"].append(log["day"])
         graph_data["Distance"].append(log["total_distance"])
+
+    return graph_data
@@ -0,0 +1,59 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from log.models import CardioLog
+from log.utils import Calendar
+from users.models import User
+from .services import update_cardio_rollup
+
+
+def get_rollup_day(value):
+    """Returns the local date a cardio log's datetime is rolled up under"""
+    value = CardioLog._meta.get_field("datetime").to_python(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return timezone.localtime(value).date()
+
+
+def update_rollup_day(user_id, day):
+    """Recomputes a day's rollup and invalidates the cached calendar month showing it"""
+    Calendar.invalidate_month(user_id, day.year, day.month)
+    update_cardio_rollup(user_id, day)
+
+
+@receiver(pre_save, sender=CardioLog)
+def remember_previous_rollup_day(sender, instance, raw=False, **kwargs):
+    """Remembers the day an updated log was previously rolled up under"""
+    instance._previous_rollup = None
+    if raw or instance.pk is None:
+        return
+
+    previous = (
+        CardioLog.objects.filter(pk=instance.pk)
+        .values_list("user_id", "datetime")
+        .first()
+    )
+    if previous is not None:
+        instance._previous_rollup = (previous[0], get_rollup_day(previous[1]))
+
+
+@receiver(post_save, sender=CardioLog)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    rollup = (instance.user_id, get_rollup_day(instance.datetime))
+    update_rollup_day(*rollup)
+
+    previous_rollup = getattr(instance, "_previous_rollup", None)
+    if previous_rollup is not None and previous_rollup != rollup:
+        update_rollup_day(*previous_rollup)
+
+
+@receiver(post_delete, sender=CardioLog)
+def update_rollup_on_delete(sender, instance, origin=None, **kwargs):
+    # The user's rollups are removed with them
+    if isinstance(origin, User):
+        return
+
+    update_rollup_day(instance.user_id, get_rollup_day(instance.datetime))
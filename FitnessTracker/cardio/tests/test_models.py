@@ -0,0 +1,102 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from cardio.models import CardioDailyRollup
+from cardio.services import (
+    find_cardio_rollup_mismatches,
+    get_cardio_rollups_grouped_by_day,
+    rebuild_cardio_rollups,
+)
+from log.models import CardioLog
+from users.models import User
+from common.test_globals import CREATE_USER
+
+
+class TestCardioDailyRollup(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(**CREATE_USER)
+        self.now = timezone.now()
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def create_log(self, datetime, distance=3, seconds=1800):
+        return CardioLog.objects.create(
+            user=self.user,
+            datetime=datetime,
+            distance=distance,
+            duration=timedelta(seconds=seconds),
+        )
+
+    def get_rollup(self, date):
+        return CardioDailyRollup.objects.get(user=self.user, date=date)
+
+    def test_rollup_created_and_updated_on_save(self):
+        self.create_log(self.now, distance=3, seconds=1800)
+        self.create_log(self.now, distance=2, seconds=600)
+
+        rollup = self.get_rollup(self.today)
+        self.assertEqual(rollup.total_distance, 5)
+        self.assertEqual(rollup.total_duration, timedelta(seconds=2400))
+        self.assertEqual(rollup.count, 2)
+
+    def test_rollup_moves_when_log_date_changes(self):
+        log = self.create_log(self.now)
+        self.create_log(self.now, distance=1)
+
+        log.datetime = self.now - timedelta(days=1)
+        log.save()
+
+        self.assertEqual(self.get_rollup(self.today).total_distance, 1)
+        self.assertEqual(self.get_rollup(self.yesterday).total_distance, 3)
+
+    def test_rollup_removed_when_last_log_deleted(self):
+        log = self.create_log(self.now)
+        log.delete()
+
+        self.assertFalse(CardioDailyRollup.objects.filter(user=self.user).exists())
+
+    def test_get_cardio_rollups_grouped_by_day(self):
+        self.create_log(self.now - timedelta(days=1), distance=2)
+        self.create_log(self.now, distance=4)
+
+        result = list(
+            get_cardio_rollups_grouped_by_day(self.user, self.yesterday, self.today)
+        )
+
+        self.assertEqual([log["day"] for log in result], [self.yesterday, self.today])
+        self.assertEqual([log["total_distance"] for log in result], [2, 4])
+
+    def test_find_and_rebuild_mismatches(self):
+        self.create_log(self.now)
+        self.create_log(self.now - timedelta(days=1))
+        CardioDailyRollup.objects.filter(user=self.user, date=self.today).update(
+            total_distance=100
+        )
+        CardioDailyRollup.objects.filter(user=self.user, date=self.yesterday).delete()
+
+        self.assertEqual(
+            find_cardio_rollup_mismatches(self.user), [self.yesterday, self.today]
+        )
+
+        self.assertEqual(rebuild_cardio_rollups(self.user), 2)
+        self.assertEqual(find_cardio_rollup_mismatches(self.user), [])
+
+    def test_check_command_fixes_mismatches(self):
+        self.create_log(self.now)
+        CardioDailyRollup.objects.filter(user=self.user).delete()
+
+        out = StringIO()
+        call_command("check_cardio_rollups", "--fix", stdout=out)
+
+        self.assertIn(self.today.isoformat(), out.getvalue())
+        self.assertEqual(self.get_rollup(self.today).count, 1)
+
+    def test_backfill_command(self):
+        self.create_log(self.now)
+        CardioDailyRollup.objects.all().delete()
+
+        call_command("backfill_cardio_rollups", stdout=StringIO())
+
+        self.assertEqual(self.get_rollup(self.today).total_distance, 3)
@@ -1,9 +1,13 @@
+import base64
+from django.conf import settings
+from django.core.cache import caches
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from users.models import User
-from common.test_utils import ViewSharedTests
+from common.common_utils import is_base64
+from common.test_utils import ViewSharedTests, SynchronousExecutor
 from unittest.mock import patch
 
 
@@ -44,6 +48,8 @@ class TestCardioLogSummariesAPIView(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("summaries", response.data)
         self.assertIn("graph", response.data)
+        self.assertEqual(response.data["mime_type"], "image/webp")
+        self.assertTrue(base64.b64decode(response.data["graph"]).startswith(b"RIFF"))
 
     def test_cardio_log_summaries_get(self):
         url = reverse("cardio_log_summaries", kwargs={"selected_range": "week"})
@@ -53,3 +59,29 @@ class TestCardioLogSummariesAPIView(TestCase):
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertIn("summaries", response.data)
             self.assertIn("graph", response.data)
+
+    def test_cardio_log_summaries_series_format(self):
+        url = reverse("cardio_log_summaries", kwargs={"selected_range": "week"})
+        response = self.client.get(url, {"format": "series"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["graph"]["dates"]), 7)
+        self.assertEqual(response.data["graph"]["Distance"], [0] * 7)
+
+    @patch("common.graph_pool._get_executor", return_value=SynchronousExecutor())
+    def test_cardio_log_summaries_async_format(self, mock_get_executor):
+        caches[settings.GRAPH_CACHE_ALIAS].clear()
+        url = reverse("cardio_log_summaries", kwargs={"selected_range": "week"})
+        response = self.client.get(url, {"format": "async"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        job = response.data["graph"]
+        self.assertEqual(job["status"], "done")
+
+        job_url = reverse("graph_job", kwargs={"job_id": job["job_id"]})
+        response = self.client.get(job_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(is_base64(response.data["graph"]))
+
+    def test_unknown_graph_job(self):
+        response = self.client.get(reverse("graph_job", kwargs={"job_id": "unknown"}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,7 +1,6 @@
-from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.views import APIView
-from common.base import BaseTemplateView
+from common.base import BaseTemplateView, BaseGraphAPIView
+from common.common_utils import Graph
 from .services import get_cardio_log_summaries
 
 
@@ -15,19 +14,24 @@ class CardioTemplateView(BaseTemplateView):
         return context
 
 
-class CardioLogSummariesAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+class CardioLogSummariesAPIView(BaseGraphAPIView):
+    # WebP is the smallest format for the bar graph, SVG grows with the year range
+    image_type = Graph.WEBP
 
     def get(self, request, *args, **kwargs):
         selected_range = kwargs.get("selected_range")
 
         cardio_log_summaries, graph = get_cardio_log_summaries(
-            request.user, selected_range
+            request.user,
+            selected_range,
+            self.get_graph_format(),
+            self.get_image_type(),
         )
 
         data = {
             "summaries": cardio_log_summaries,
             "graph": graph,
+            "mime_type": self.get_mime_type(),
         }
 
         return Response(data)
@@ -1,10 +1,20 @@
+import abc
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
 from django.views.generic import TemplateView
 from django.db.models import Q
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from common.permissions import IsOwner
+from common.common_utils import Graph
+from common.search import PrefixSearch
 from users.models import UserSettings, User
 from django.shortcuts import render
 
@@ -37,6 +47,18 @@ class BaseOwnerViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
+class DateCursorPagination(CursorPagination):
+    """
+    Cursor pagination over newest logs first, pages stay cheap however far back a
+    client scrolls since each page is a bounded range query instead of an offset.
+    """
+
+    ordering = ("-date", "-pk")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
 class BaseTemplateView(LoginRequiredMixin, TemplateView):
     """Abstract base template view that adds login required permissions, and user_settings to context"""
 
@@ -60,3 +82,91 @@ class BaseTemplateView(LoginRequiredMixin, TemplateView):
         ):
             return render(request, self.fetch_template_name, context)
         return render(request, self.template_name, context)
+
+
+class GraphContentNegotiation(DefaultContentNegotiation):
+    """
+    Content negotiation that treats ?format=series and ?format=async as requests for JSON
+    graph data instead of renderers with those names.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        graph_format = request.query_params.get(api_settings.URL_FORMAT_OVERRIDE)
+        if graph_format in (Graph.SERIES_FORMAT, Graph.ASYNC_FORMAT):
+            format_suffix = "json"
+        return super().select_renderer(request, renderers, format_suffix)
+
+
+class BaseGraphAPIView(APIView):
+    """
+    Abstract base API view for endpoints that return graphs. Clients may pass ?format=series
+    to receive the graph's data series and draw it themselves instead of a rendered image, or
+    ?format=async to receive a render job that can be polled through GraphJobAPIView.
+    Images default to the endpoint's image_type, clients may pick another with ?image=.
+    Image responses carry the MIME type of the returned graphs so clients can display them.
+    """
+
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = GraphContentNegotiation
+    image_type = Graph.PNG
+
+    def get_image_type(self):
+        image_type = self.request.query_params.get("image", self.image_type)
+        if image_type in Graph.IMAGE_TYPES:
+            return image_type
+        return self.image_type
+
+    def get_mime_type(self):
+        return Graph.MIME_TYPES[self.get_image_type()]
+
+    def get_graph_format(self):
+        graph_format = self.request.query_params.get(api_settings.URL_FORMAT_OVERRIDE)
+        if graph_format in (Graph.SERIES_FORMAT, Graph.ASYNC_FORMAT):
+            return graph_format
+        return Graph.IMAGE_FORMAT
+
+
+class BaseSearchAPIView(APIView, metaclass=abc.ABCMeta):
+    """
+    Abstract type-ahead search view for ?q=<query>&seq=<request sequence id>.
+    Queries shorter than SEARCH_MIN_QUERY_LENGTH return no results, and requests
+    older than the latest seq the user sent are answered as stale without searching.
+    The seq is echoed back so clients can drop responses that arrive out of order.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @abc.abstractmethod
+    def get_prefix_search(self):
+        """Returns the PrefixSearch answering the view's queries"""
+
+    def get_sequence_key(self):
+        return f"search_seq_{self.request.user.id}_{self.__class__.__name__}"
+
+    def is_stale(self, seq):
+        """Records seq as the user's latest search unless a newer one was received"""
+        sequence_key = self.get_sequence_key()
+        latest_seq = cache.get(sequence_key)
+        if latest_seq is not None and latest_seq > seq:
+            return True
+        cache.set(sequence_key, seq, settings.SEARCH_CACHE_TIMEOUT)
+        return False
+
+    def get(self, request, *args, **kwargs):
+        query = PrefixSearch.normalize(request.query_params.get("q", ""))
+        try:
+            seq = int(request.query_params["seq"])
+        except KeyError:
+            seq = None
+        except ValueError:
+            return Response(
+                {"detail": "seq must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = {"query": query, "seq": seq, "stale": False, "results": {}}
+        if seq is not None and self.is_stale(seq):
+            data["stale"] = True
+        elif len(query) >= settings.SEARCH_MIN_QUERY_LENGTH:
+            data["results"] = self.get_prefix_search().search(query)
+        return Response(data)
@@ -1,45 +1,118 @@
-from datetime import timedelta
+from datetime import timedelta, date
 from django.db.models import Q, When, Case, QuerySet, Model, Subquery, OuterRef
 from django.db import models, transaction
 from django.shortcuts import get_object_or_404
+from django.core.cache import caches
+from django.conf import settings
 import matplotlib
 import matplotlib.dates as mdates
-from matplotlib.ticker import MaxNLocator
-from matplotlib import pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
 from io import BytesIO
 import base64
-import pandas as pd
+import hashlib
+import numpy as np
+from common.graph_pool import submit_graph_job, render_graph, render_pie_chart
 from users.models import User
 
-matplotlib.use("Agg")
+# Keep SVG text as text rather than glyph paths and make element ids deterministic so
+# identical graphs produce identical bytes
+matplotlib.rcParams["svg.fonttype"] = "none"
+matplotlib.rcParams["svg.hashsalt"] = "graph"
 
 
 class Graph:
-    def __init__(self, graph_data, y_label, kind, start=None, end=None):
+    IMAGE_FORMAT = "image"
+    SERIES_FORMAT = "series"
+    ASYNC_FORMAT = "async"
+
+    PNG = "png"
+    SVG = "svg"
+    WEBP = "webp"
+    IMAGE_TYPES = (PNG, SVG, WEBP)
+    MIME_TYPES = {PNG: "image/png", SVG: "image/svg+xml", WEBP: "image/webp"}
+
+    def __init__(self, graph_data, y_label, kind, start=None, end=None, image_type=PNG):
         self.graph_data = graph_data
         self.start = start
         self.end = end
         self.y_label = y_label
         self.kind = kind
+        self.image_type = image_type
+
+    def get_graph(self, graph_format=IMAGE_FORMAT):
+        """Returns the graph as a base64 image, its data series or a render job depending on format"""
+        if graph_format == Graph.SERIES_FORMAT:
+            return self.get_series()
+        if graph_format == Graph.ASYNC_FORMAT:
+            return self.submit_graph()
+        return self.plot_graph()
+
+    def submit_graph(self):
+        """Queues the graph to render in the worker pool, returns the job to poll for the image"""
+        return submit_graph_job(
+            self.get_cache_key(),
+            render_graph,
+            self.graph_data,
+            self.y_label,
+            self.kind,
+            self.start,
+            self.end,
+            self.image_type,
+        )
 
     def plot_graph(self):
+        """Returns the base64 graph image, rendering it only if it isn't already cached"""
+        graph_cache = caches[settings.GRAPH_CACHE_ALIAS]
+        cache_key = self.get_cache_key()
+
+        img_base64 = graph_cache.get(cache_key)
+        if img_base64 is None:
+            img_base64 = self.render_graph()
+            if len(img_base64) <= settings.GRAPH_CACHE_MAX_ITEM_SIZE:
+                graph_cache.set(cache_key, img_base64)
+
+        return img_base64
+
+    def get_cache_key(self):
+        """Fingerprints the graph input so identical data maps to the same cached image"""
+        fingerprint = repr(
+            (
+                self.kind,
+                self.image_type,
+                settings.GRAPH_DPI,
+                self.y_label,
+                self.start,
+                self.end,
+                list(self.graph_data.get("dates", [])),
+                list(self.graph_data.get(self.y_label, [])),
+            )
+        )
+        return "graph_" + hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+    def render_graph(self):
+        dates, values = self.get_filled_data()
+        figure = Figure(figsize=(10, 6))
+        self.configure_graph_settings(figure, dates, values)
+        return Graph.convert_to_img_base64(figure, self.image_type)
+
+    def get_series(self):
+        """Returns the gap filled graph data so clients can draw the graph themselves"""
+        dates, values = self.get_filled_data()
+        return {
+            "dates": [date.strftime("%Y-%m-%d") for date in dates],
+            self.y_label: values,
+        }
+
+    def get_filled_data(self):
+        """Returns graph dates and values with any missing dates filled"""
         if self.kind == "bar":
             self.add_start_end_dates_to_graph_data()
 
-        df = pd.DataFrame(
-            {
-                "Date": self.graph_data["dates"],
-                self.y_label: self.graph_data[self.y_label],
-            }
+        return self.fill_date_indexes(
+            self.graph_data["dates"], self.graph_data[self.y_label]
         )
 
-        df_full = self.fill_date_indexes(df)
-        self.configure_graph_settings(plt, df_full, self.y_label)
-        img_base64 = Graph.convert_to_img_base64(plt)
-        plt.close()
-
-        return img_base64
-
     def add_start_end_dates_to_graph_data(self):
         """Adds start and end dates to graph_data if they don't exist"""
         if not self.graph_data["dates"]:
@@ -55,28 +128,24 @@ class Graph:
             self.graph_data["dates"].append(self.end)
             self.graph_data[self.y_label].append(0)
 
-    def fill_date_indexes(self, df):
-        """Fills date index with any missing dates"""
-        df.set_index("Date", inplace=True)
+    def fill_date_indexes(self, dates, values):
+        """Fills bar graph data with any missing dates"""
         if self.kind == "bar":
-            start_date = df.index.min()
-            end_date = df.index.max()
-            full_date_range = pd.date_range(start=start_date, end=end_date)
-            return df.reindex(full_date_range, fill_value=0)
-        return df
+            return fill_date_gaps(dates, values)
+        return list(dates), list(values)
 
-    def configure_graph_settings(self, plt, df_full, y_label):
+    def configure_graph_settings(self, figure, dates, values):
         """Configures graph display"""
-        plt.figure(figsize=(10, 6))
+        ax = figure.add_subplot()
 
         if self.kind == "bar":
-            df_full[y_label].plot(kind="bar", width=0.8, color="skyblue")
+            ax.bar(range(len(dates)), values, width=0.8, color="skyblue")
+            ax.set_xlim(-0.5, len(dates) - 0.5)
         else:
-            df_full[y_label].plot(kind="line", color="skyblue")
+            ax.plot(dates, values, color="skyblue")
 
-        ax = plt.gca()
-        if df_full.empty:
-            plt.text(
+        if not dates:
+            ax.text(
                 0.5,
                 0.5,
                 "No Data",
@@ -84,35 +153,39 @@ class Graph:
                 ha="center",
                 va="center",
                 color="#f5f5f5",
-                transform=plt.gca().transAxes,
+                transform=ax.transAxes,
             )
         else:
-            self.set_xticks(df_full, ax)
-            plt.xticks(
-                rotation=45,
-                color="#f5f5f5",
-                fontsize=24,
+            self.set_xticks(ax, dates, values)
+            ax.tick_params(
+                axis="x", labelrotation=45, labelcolor="#f5f5f5", labelsize=24
             )
-            plt.yticks(color="#f5f5f5", fontsize=14)
             ax.tick_params(axis="y", labelsize=24, colors="#f5f5f5")
             ax.yaxis.set_major_locator(MaxNLocator(10))
 
-        plt.gcf().set_facecolor("#212121")
-        plt.ylabel(y_label, color="#f5f5f5", fontsize=24)
+        figure.set_facecolor("#212121")
+        ax.set_ylabel(self.y_label, color="#f5f5f5", fontsize=24)
         ax.set_facecolor("#212121")
         for spine in ax.spines.values():
             spine.set_edgecolor("#f5f5f5")
 
-        plt.tight_layout()
+        figure.tight_layout()
 
-    def set_xticks(self, df, ax):
-        min_y, max_y = min(df[self.y_label]), max(df[self.y_label])
+    def set_xticks(self, ax, dates, values):
+        min_y, max_y = min(values), max(values)
         if self.kind == "bar":
-            ax.set_xticklabels([date.strftime("%m/%d") for date in df.index])
+            labels = [date.strftime("%m/%d") for date in dates]
             if max_y == 0:
                 ax.set_ylim(0, 5)
-            if len(df) > 7:
-                ax.xaxis.set_major_locator(MaxNLocator(10))
+            if len(dates) > 7:
+                ax.xaxis.set_major_locator(MaxNLocator(10, integer=True))
+            else:
+                ax.set_xticks(range(len(dates)))
+            ax.xaxis.set_major_formatter(
+                FuncFormatter(
+                    lambda x, _: labels[int(x)] if 0 <= int(x) < len(labels) else ""
+                )
+            )
         else:
             max_y = 150 if max_y == 0 else max_y
             ax.set_ylim(max(0, min_y * 0.8), max_y * 1.20)
@@ -120,20 +193,44 @@ class Graph:
             ax.xaxis.set_major_formatter(mdates.DateFormatter("%m/%d"))
 
     @staticmethod
-    def convert_to_img_base64(plt):
+    def convert_to_img_base64(figure, image_type=PNG):
         """Convert graph to base64 to insert on page with javascript"""
         buffer = BytesIO()
-        plt.savefig(buffer, format="png", transparent=True)
-        buffer.seek(0)
+        if image_type == Graph.SVG:
+            figure.savefig(
+                buffer, format="svg", transparent=True, metadata={"Date": None}
+            )
+        elif image_type == Graph.WEBP:
+            figure.savefig(
+                buffer,
+                format="webp",
+                transparent=True,
+                dpi=settings.GRAPH_DPI,
+                pil_kwargs={"quality": 80},
+            )
+        else:
+            figure.savefig(
+                buffer, format="png", transparent=True, dpi=settings.GRAPH_DPI
+            )
         img_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
         return img_base64
 
     @staticmethod
-    def plot_pie_chart(labels, sizes):
-        plt.figure(figsize=(6, 6))
+    def submit_pie_chart(labels, sizes, image_type=PNG):
+        """Queues the pie chart to render in the worker pool, returns the job to poll for the image"""
+        fingerprint = repr(
+            ("pie", image_type, settings.GRAPH_DPI, list(labels), list(sizes))
+        )
+        cache_key = "graph_" + hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+        return submit_graph_job(cache_key, render_pie_chart, labels, sizes, image_type)
+
+    @staticmethod
+    def plot_pie_chart(labels, sizes, image_type=PNG):
+        figure = Figure(figsize=(6, 6))
+        ax = figure.add_subplot()
         colors = ["#ff9999", "#66b3ff", "#99ff99"]
 
-        patches, texts, autotexts = plt.pie(
+        patches, texts, autotexts = ax.pie(
             sizes, labels=labels, colors=colors, autopct="%1.1f%%", startangle=90
         )
         for text in texts:
@@ -143,9 +240,39 @@ class Graph:
         for autotext in autotexts:
             autotext.set_fontsize(24)
 
-        plt.axis("equal")
+        ax.axis("equal")
+
+        return Graph.convert_to_img_base64(figure, image_type)
+
 
-        return Graph.convert_to_img_base64(plt)
+def fill_date_gaps(dates, values):
+    """
+    Densifies sparse date/value pairs into a contiguous daily series running from the
+    earliest to the latest date, missing days are filled with 0.
+
+    Parameters:
+        dates (list[date]): The dates that have values.
+        values (list): The value for each date.
+
+    Returns:
+        tuple[list[date], list]: Every date in the range and its value.
+    """
+    if not dates:
+        return [], []
+
+    ordinals = np.fromiter(
+        (day.toordinal() for day in dates), dtype=np.int64, count=len(dates)
+    )
+    first = int(ordinals.min())
+    span = int(ordinals.max()) - first + 1
+
+    values = np.asarray(values)
+    filled = np.zeros(span, dtype=values.dtype)
+    filled[ordinals - first] = values
+
+    return [
+        date.fromordinal(day) for day in range(first, first + span)
+    ], filled.tolist()
 
 
 def is_base64(s):
@@ -222,6 +349,59 @@ def get_user_model_or_default(
     return model.objects.filter(query)
 
 
+def get_user_models_by_name(user: User, model: Model, names) -> dict:
+    """
+    Resolve several names to a user's instances of a model with a single lookup.
+
+    Names are matched case-insensitively against the user's and the default user's
+    instances, preferring the user's. Default instances are cloned for the user and
+    unknown names are created, both in bulk unless the model has many to many fields.
+
+    Parameters:
+        user (User): The user the instances belong to.
+        model (Model): A model with user and name fields.
+        names (Iterable[str]): The names to resolve, duplicates are allowed.
+
+    Returns:
+        dict: Each given name mapped to the user's instance.
+    """
+    titles = {name: name.strip().title() for name in names}
+    if not titles:
+        return {}
+
+    default_user = User.get_default_user()
+    name_query = Q()
+    for title in set(titles.values()):
+        name_query |= Q(name__iexact=title)
+
+    instances = {}
+    for instance in model.objects.filter(
+        name_query, user__in=[user, default_user]
+    ).order_by(Case(When(user=user, then=0), default=1)):
+        instances.setdefault(instance.name.lower(), instance)
+
+    new_instances = []
+    for title in dict.fromkeys(titles.values()):
+        instance = instances.get(title.lower())
+        if instance is None:
+            instance = model(user=user, name=title)
+        elif instance.user_id == user.id:
+            continue
+        elif model._meta.many_to_many:
+            instances[title.lower()] = clone_for_user(instance, user)
+            continue
+        else:
+            instance.pk = None
+            instance.user = user
+
+        instances[title.lower()] = instance
+        new_instances.append(instance)
+
+    model.objects.bulk_create(new_instances)
+
+    return {name: instances[title.lower()] for name, title in titles.items()}
+
+
 def query_default_included(
     model: Model, user: User, default_user: User, query: Q
 ) -> QuerySet:
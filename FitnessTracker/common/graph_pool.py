@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+# Futures of the jobs submitted by this process, job state shared with the other
+# web workers is kept in the graph cache under get_job_key
+_pending_jobs = {}
+_lock = threading.RLock()
+PENDING_JOB = {"status": "pending", "graph": None}
+
+
+def get_job_key(job_id):
+    return f"graph_job_{job_id}"
+
+
+def _warm_up_worker():
+    """Loads Django and matplotlib once per worker process so jobs don't pay for imports"""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "FitnessTracker.settings")
+    django.setup()
+
+    import matplotlib.figure  # noqa: F401
+    import matplotlib.backends.backend_agg  # noqa: F401
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.GRAPH_RENDER_WORKERS, initializer=_warm_up_worker
+        )
+    return _executor
+
+
+def _reset_executor(broken_executor):
+    """Drops a pool whose worker crashed so the next job starts a new one"""
+    global _executor
+    with _lock:
+        if _executor is broken_executor:
+            _executor = None
+    broken_executor.shutdown(wait=False)
+
+
+def _submit(render, *args):
+    """Submits to the pool, rebuilding it once if it is broken, returns the future and pool"""
+    executor = _get_executor()
+    try:
+        return executor.submit(render, *args), executor
+    except BrokenProcessPool:
+        _reset_executor(executor)
+        executor = _get_executor()
+        return executor.submit(render, *args), executor
+
+
+def render_graph(graph_data, y_label, kind, start, end, image_type):
+    from common.common_utils import Graph
+
+    return Graph(graph_data, y_label, kind, start, end, image_type).render_graph()
+
+
+def render_pie_chart(labels, sizes, image_type):
+    from common.common_utils import Graph
+
+    return Graph.plot_pie_chart(labels, sizes, image_type)
+
+
+def submit_graph_job(job_id, render, *args):
+    """
+    Renders a graph in the worker pool and stores the image in the graph cache. The
+    job is marked pending in the graph cache, so any web worker sharing the cache
+    can report on it and identical requests to them don't render it again.
+
+    Parameters:
+        job_id (str): The graph's cache key, identical graphs share a single job.
+        render (callable): Module level render function run in the worker.
+        *args: Arguments passed to render.
+
+    Returns:
+        dict: The job, including the image if it was already cached.
+    """
+    job = get_graph_job(job_id)
+    if job is not None:
+        return job
+
+    with _lock:
+        future = _pending_jobs.get(job_id)
+        submitted = future is None
+        if submitted:
+            future, executor = _submit(render, *args)
+            _pending_jobs[job_id] = future
+            caches[settings.GRAPH_CACHE_ALIAS].set(
+                get_job_key(job_id), PENDING_JOB, settings.GRAPH_JOB_TIMEOUT
+            )
+
+    # Added outside the lock, the callback runs immediately if the job already finished
+    if submitted:
+        future.add_done_callback(lambda future: _store_result(job_id, future, executor))
+
+    return get_graph_job(job_id) or {"job_id": job_id, **PENDING_JOB}
+
+
+def get_graph_job(job_id):
+    """
+    Returns the status of a graph job, or None if the job is unknown or failed.
+    Finished jobs can be read until their image or result expires.
+    """
+    job_key = get_job_key(job_id)
+    cached = caches[settings.GRAPH_CACHE_ALIAS].get_many([job_id, job_key])
+    if job_id in cached:
+        return {"job_id": job_id, "status": "done", "graph": cached[job_id]}
+    if job_key in cached:
+        return {"job_id": job_id, **cached[job_key]}
+
+    future = _pending_jobs.get(job_id)
+    if future is None:
+        return None
+    if not future.done():
+        return {"job_id": job_id, "status": "pending", "graph": None}
+    if future.exception() is not None:
+        return None
+    return {"job_id": job_id, "status": "done", "graph": future.result()}
+
+
+def _store_result(job_id, future, executor):
+    graph_cache = caches[settings.GRAPH_CACHE_ALIAS]
+    job_key = get_job_key(job_id)
+    exception = future.exception()
+    if exception is not None:
+        logger.error("Graph job %s failed", job_id, exc_info=exception)
+        if isinstance(exception, BrokenProcessPool):
+            _reset_executor(executor)
+        graph_cache.delete(job_key)
+    else:
+        img_base64 = future.result()
+        if len(img_base64) <= settings.GRAPH_CACHE_MAX_ITEM_SIZE:
+            graph_cache.set(job_id, img_base64)
+            graph_cache.delete(job_key)
+        else:
+            # Too large to keep as a graph, kept only as the job's result
+            graph_cache.set(
+                job_key,
+                {"status": "done", "graph": img_base64},
+                settings.GRAPH_JOB_TIMEOUT,
+            )
+
+    with _lock:
+        _pending_jobs.pop(job_id, None)
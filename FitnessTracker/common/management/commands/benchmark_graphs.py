@@ -0,0 +1,127 @@
+import base64
+import random
+import time
+import timeit
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from common.common_utils import fill_date_gaps, Graph
+
+
+def pandas_fill_date_gaps(dates, values):
+    """Reference gap filling using the previous pandas reindex implementation"""
+    import pandas as pd
+
+    df = pd.DataFrame({"Date": dates, "Value": values}).set_index("Date")
+    full_date_range = pd.date_range(start=df.index.min(), end=df.index.max())
+    df = df.reindex(full_date_range, fill_value=0)
+    return [day.date() for day in df.index], df["Value"].tolist()
+
+
+def get_sparse_graph_data(start, end, density=0.3):
+    """Returns sorted dates between start and end, with values on roughly density of days"""
+    span = (end - start).days
+    days = sorted(random.sample(range(1, span), int((span - 1) * density)))
+    dates = [start] + [start + timedelta(days=day) for day in days] + [end]
+    values = [0] + [round(random.uniform(1, 10), 2) for _ in days] + [0]
+    return dates, values
+
+
+def get_benchmark_graphs(today):
+    """Returns graphs shaped like the cardio week/month/year and stats line graphs"""
+    week_start = today - timedelta(days=6)
+    month_start = today - timedelta(days=30)
+    year_start = today - timedelta(days=365)
+    stats_start = today - timedelta(days=180)
+
+    def cardio_graph(start, image_type):
+        dates, values = get_sparse_graph_data(start, today)
+        return Graph(
+            {"dates": dates, "Distance": values},
+            "Distance",
+            "bar",
+            start,
+            today,
+            image_type,
+        )
+
+    def stats_graph(image_type):
+        dates, values = get_sparse_graph_data(stats_start, today, density=0.1)
+        weights = [150 + value for value in values]
+        return Graph(
+            {"dates": dates, "Weight": weights}, "Weight", "line", image_type=image_type
+        )
+
+    return {
+        "cardio week": lambda image_type: cardio_graph(week_start, image_type),
+        "cardio month": lambda image_type: cardio_graph(month_start, image_type),
+        "cardio year": lambda image_type: cardio_graph(year_start, image_type),
+        "stats line": stats_graph,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks graph gap filling against the previous pandas implementation and "
+        "reports render time and payload size for each image type"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--number", type=int, default=20)
+        parser.add_argument("--renders", type=int, default=5)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        today = timezone.localdate()
+        self.benchmark_gap_filling(today, options)
+        self.benchmark_image_types(today, options)
+
+    def benchmark_image_types(self, today, options):
+        self.stdout.write(f"\nImage types at {settings.GRAPH_DPI} dpi")
+        for name, get_graph in get_benchmark_graphs(today).items():
+            for image_type in Graph.IMAGE_TYPES:
+                # Graph fills its data in place, so every render gets a fresh instance
+                random.seed(0)
+                graphs = [get_graph(image_type) for _ in range(options["renders"] + 1)]
+                img_base64 = graphs[0].render_graph()
+                started = time.perf_counter()
+                for graph in graphs[1:]:
+                    graph.render_graph()
+                elapsed = (time.perf_counter() - started) / options["renders"]
+
+                self.stdout.write(
+                    f"{name:>12} {image_type:>5}: {elapsed * 1000:7.1f} ms "
+                    f"{len(base64.b64decode(img_base64)):>8} bytes "
+                    f"{len(img_base64):>8} base64 bytes"
+                )
+
+    def benchmark_gap_filling(self, today, options):
+        self.stdout.write("Gap filling")
+        windows = {
+            "7 days": today - timedelta(days=6),
+            "180 days": today - timedelta(days=180),
+            "100 years": today.replace(year=today.year - 100),
+        }
+
+        for name, start in windows.items():
+            dates, values = get_sparse_graph_data(start, today)
+            if fill_date_gaps(dates, values) != pandas_fill_date_gaps(dates, values):
+                self.stderr.write(f"{name}: results differ from pandas")
+                continue
+
+            for label, fill in (
+                ("numpy", fill_date_gaps),
+                ("pandas", pandas_fill_date_gaps),
+            ):
+                best = min(
+                    timeit.repeat(
+                        lambda: fill(dates, values),
+                        repeat=options["repeat"],
+                        number=options["number"],
+                    )
+                )
+                self.stdout.write(
+                    f"{name:>10} {label:>7}: {best / options['number'] * 1000:.3f} ms"
+                )
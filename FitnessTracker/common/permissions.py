@@ -4,4 +4,6 @@ from users.models import User
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user or obj.user == User.get_default_user()
+        return (
+            obj.user_id == request.user.id or obj.user_id == User.get_default_user().id
+        )
@@ -0,0 +1,69 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+
+
+class PrefixSearch:
+    """
+    Caches type-ahead search results by query. Results are a dict of lists of items
+    and a search also reports whether it returned every match. When a shorter prefix
+    of a query has a complete cached result, the query is answered by filtering it,
+    so typing "chic" after "chi" costs no search at all. A filtered result with no
+    items is searched again instead, letting searches with a fallback for queries
+    they have nothing for, like the food catalog's Nutritionix one, run it.
+    """
+
+    def __init__(self, key, search, name_field="name"):
+        self.key = key
+        self.search_function = search
+        self.name_field = name_field
+
+    @staticmethod
+    def normalize(query):
+        return " ".join(query.lower().split())
+
+    def get_cache_key(self, query):
+        # Hashed so queries of any length or with spaces make valid memcached keys
+        query_hash = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        return f"prefix_search_{self.key}_{query_hash}"
+
+    def filter(self, results, query):
+        return {
+            category: [
+                item
+                for item in items
+                if self.normalize(item[self.name_field]).startswith(query)
+            ]
+            for category, items in results.items()
+        }
+
+    def search(self, query):
+        query = self.normalize(query)
+        # Every cached prefix, down to the shortest one allowed, is read at once
+        prefixes = [
+            query[:length]
+            for length in range(len(query), settings.SEARCH_MIN_QUERY_LENGTH - 1, -1)
+        ]
+        cached = cache.get_many([self.get_cache_key(prefix) for prefix in prefixes])
+
+        for prefix in prefixes:
+            entry = cached.get(self.get_cache_key(prefix))
+            if entry is None:
+                continue
+            results, complete = entry
+            if prefix == query:
+                return results
+            if complete:
+                results = self.filter(results, query)
+                if any(results.values()):
+                    return results
+                break
+
+        results, complete = self.search_function(query)
+        if results is not None:
+            cache.set(
+                self.get_cache_key(query),
+                (results, complete),
+                settings.SEARCH_CACHE_TIMEOUT,
+            )
+        return results
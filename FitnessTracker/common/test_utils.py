@@ -4,7 +4,9 @@ from django.test import Client
 from django.urls import reverse
 from bs4 import BeautifulSoup
 import abc
+from concurrent.futures import Future
 from users.models import User, UserSettings
+from log.models import FoodItem
 from unittest import skipIf
 from django.contrib.staticfiles.testing import StaticLiveServerTestCase
 from selenium import webdriver
@@ -44,6 +46,29 @@ def form_with_valid_csrf_token(page, form_data, login=False):
     return response.status_code
 
 
+def get_food_items(*names, calories=100, protein=10, carbs=10, fat=5):
+    """Returns unsaved food items with the given names, for Food.record_logged"""
+    return [
+        FoodItem(name=name, calories=calories, protein=protein, carbs=carbs, fat=fat)
+        for name in names
+    ]
+
+
+class SynchronousExecutor:
+    """Stands in for the graph render pool, running each job in the calling thread"""
+
+    def submit(self, function, *args):
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
 def elements_exist(soup, elements):
     """
     Check if all elements exist in the soup.
@@ -1,5 +1,13 @@
+import base64
 import unittest
-from common.common_utils import is_base64
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from unittest.mock import patch
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from common.common_utils import is_base64, fill_date_gaps, Graph
+from common.management.commands.benchmark_graphs import pandas_fill_date_gaps
 
 
 class TestBase64Validation(unittest.TestCase):
@@ -23,3 +31,149 @@ class TestBase64Validation(unittest.TestCase):
         ]
         for s in invalid_base64_strings:
             self.assertFalse(is_base64(s), f"Expected {s} to be invalid base64.")
+
+
+class TestGraphCache(TestCase):
+    def setUp(self):
+        caches[settings.GRAPH_CACHE_ALIAS].clear()
+        self.start = date(2024, 4, 12)
+        self.end = date(2024, 4, 18)
+
+    def get_graph(self, distance=3):
+        graph_data = {"dates": [date(2024, 4, 15)], "Distance": [distance]}
+        return Graph(graph_data, "Distance", "bar", self.start, self.end)
+
+    def test_identical_data_is_rendered_once(self):
+        with patch.object(Graph, "render_graph", return_value="aW1n") as mock_render:
+            first = self.get_graph().plot_graph()
+            second = self.get_graph().plot_graph()
+
+        self.assertEqual(first, second)
+        mock_render.assert_called_once_with()
+
+    def test_changed_data_is_rendered_again(self):
+        with patch.object(Graph, "render_graph", return_value="aW1n") as mock_render:
+            self.get_graph(distance=3).plot_graph()
+            self.get_graph(distance=4).plot_graph()
+
+        self.assertEqual(mock_render.call_count, 2)
+
+    def test_oversized_images_are_not_cached(self):
+        with self.settings(GRAPH_CACHE_MAX_ITEM_SIZE=2):
+            with patch.object(
+                Graph, "render_graph", return_value="aW1n"
+            ) as mock_render:
+                self.get_graph().plot_graph()
+                self.get_graph().plot_graph()
+
+        self.assertEqual(mock_render.call_count, 2)
+
+    def test_cache_hit_returns_rendered_image(self):
+        rendered = self.get_graph().plot_graph()
+        cached = self.get_graph().plot_graph()
+        self.assertTrue(is_base64(rendered))
+        self.assertEqual(rendered, cached)
+
+
+class TestFillDateGaps(unittest.TestCase):
+    def test_missing_dates_filled_with_zero(self):
+        dates, values = fill_date_gaps(
+            [date(2024, 4, 12), date(2024, 4, 14), date(2024, 4, 15)], [0, 3, 2.5]
+        )
+        self.assertEqual(
+            dates,
+            [
+                date(2024, 4, 12),
+                date(2024, 4, 13),
+                date(2024, 4, 14),
+                date(2024, 4, 15),
+            ],
+        )
+        self.assertEqual(values, [0, 0, 3, 2.5])
+
+    def test_integer_values_stay_integers(self):
+        _, values = fill_date_gaps([date(2024, 4, 12), date(2024, 4, 14)], [95, 105])
+        self.assertEqual(values, [95, 0, 105])
+        self.assertIsInstance(values[1], int)
+
+    def test_no_dates(self):
+        self.assertEqual(fill_date_gaps([], []), ([], []))
+
+    def test_matches_pandas_reindex(self):
+        dates = [date(2024, 1, 1), date(2024, 2, 10), date(2024, 6, 30)]
+        values = [1.5, 2.0, 3.25]
+        self.assertEqual(
+            fill_date_gaps(dates, values), pandas_fill_date_gaps(dates, values)
+        )
+
+
+class TestGraphConcurrentRendering(unittest.TestCase):
+    def get_graphs(self):
+        end = date(2024, 4, 18)
+        graphs = []
+        for i in range(6):
+            graphs.append(
+                lambda i=i: Graph(
+                    {"dates": [end - timedelta(days=i)], "Distance": [i + 1]},
+                    "Distance",
+                    "bar",
+                    end - timedelta(days=6 + i * 10),
+                    end,
+                ).render_graph()
+            )
+            graphs.append(
+                lambda i=i: Graph(
+                    {
+                        "dates": [end - timedelta(days=30), end],
+                        "Weight": [150 + i, 148 + i],
+                    },
+                    "Weight",
+                    "line",
+                ).render_graph()
+            )
+            graphs.append(
+                lambda i=i: Graph.plot_pie_chart(
+                    ["Protein", "Carbs", "Fat"], [10 + i, 50, 20]
+                )
+            )
+        return graphs
+
+    def test_threaded_renders_match_serial_renders(self):
+        graphs = self.get_graphs()
+        serial = [render() for render in graphs]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            threaded = list(executor.map(lambda render: render(), graphs))
+
+        self.assertEqual(serial, threaded)
+
+
+class TestGraphImageTypes(unittest.TestCase):
+    def get_graph(self, image_type):
+        end = date(2024, 4, 18)
+        graph_data = {"dates": [date(2024, 4, 15)], "Distance": [3]}
+        return Graph(
+            graph_data, "Distance", "bar", end - timedelta(days=6), end, image_type
+        )
+
+    def test_image_type_signatures(self):
+        signatures = {
+            Graph.PNG: b"\x89PNG",
+            Graph.SVG: b"<?xml",
+            Graph.WEBP: b"RIFF",
+        }
+        for image_type, signature in signatures.items():
+            with self.subTest(image_type):
+                img = base64.b64decode(self.get_graph(image_type).render_graph())
+                self.assertTrue(img.startswith(signature))
+
+    def test_svg_output_is_deterministic(self):
+        first = self.get_graph(Graph.SVG).render_graph()
+        second = self.get_graph(Graph.SVG).render_graph()
+        self.assertEqual(first, second)
+
+    def test_image_type_is_part_of_cache_key(self):
+        self.assertNotEqual(
+            self.get_graph(Graph.PNG).get_cache_key(),
+            self.get_graph(Graph.SVG).get_cache_key(),
+        )
@@ -0,0 +1,79 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from common import graph_pool
+from common.test_utils import SynchronousExecutor
+
+
+def render_large_graph():
+    return "a" * 100
+
+
+def crash_worker():
+    raise BrokenProcessPool("A worker process terminated abruptly")
+
+
+class TestGraphPool(TestCase):
+    def setUp(self):
+        caches[settings.GRAPH_CACHE_ALIAS].clear()
+
+    @override_settings(GRAPH_CACHE_MAX_ITEM_SIZE=10)
+    @patch("common.graph_pool._get_executor", return_value=SynchronousExecutor())
+    def test_uncached_result_is_kept_as_job_result(self, mock_get_executor):
+        job = graph_pool.submit_graph_job("large", render_large_graph)
+
+        self.assertEqual(job["graph"], "a" * 100)
+        self.assertIsNone(caches[settings.GRAPH_CACHE_ALIAS].get("large"))
+
+    @override_settings(GRAPH_CACHE_MAX_ITEM_SIZE=10)
+    def test_uncached_result_can_be_polled_repeatedly(self):
+        future = Future()
+        future.set_result("a" * 100)
+        graph_pool._store_result("polled", future, SynchronousExecutor())
+
+        for _ in range(2):
+            self.assertEqual(graph_pool.get_graph_job("polled")["graph"], "a" * 100)
+
+    def test_job_pending_in_another_worker_is_reported(self):
+        executor = Mock()
+        executor.submit.return_value = Future()
+        with patch("common.graph_pool._get_executor", return_value=executor):
+            graph_pool.submit_graph_job("shared", render_large_graph)
+        # Another web worker shares the graph cache but not this process's futures
+        graph_pool._pending_jobs.pop("shared")
+
+        self.assertEqual(graph_pool.get_graph_job("shared")["status"], "pending")
+        graph_pool.submit_graph_job("shared", render_large_graph)
+        executor.submit.assert_called_once()
+
+        future = Future()
+        future.set_result("a")
+        graph_pool._store_result("shared", future, executor)
+        self.assertEqual(graph_pool.get_graph_job("shared")["graph"], "a")
+
+    def test_broken_pool_is_rebuilt(self):
+        broken_executor = Mock()
+        broken_executor.submit.side_effect = BrokenProcessPool()
+        graph_pool._executor = broken_executor
+        self.addCleanup(setattr, graph_pool, "_executor", None)
+
+        with patch("common.graph_pool.ProcessPoolExecutor", SynchronousExecutor):
+            with patch.object(SynchronousExecutor, "__init__", return_value=None):
+                job = graph_pool.submit_graph_job("rebuilt", render_large_graph)
+
+        self.assertEqual(job["status"], "done")
+        broken_executor.shutdown.assert_called_once_with(wait=False)
+        self.assertIsInstance(graph_pool._executor, SynchronousExecutor)
+
+    def test_crashed_job_drops_the_pool(self):
+        executor = SynchronousExecutor()
+        graph_pool._executor = executor
+        self.addCleanup(setattr, graph_pool, "_executor", None)
+
+        graph_pool.submit_graph_job("crashed", crash_worker)
+
+        self.assertIsNone(graph_pool.get_graph_job("crashed"))
+        self.assertIsNone(graph_pool._executor)
@@ -0,0 +1,67 @@
+import warnings
+from unittest.mock import Mock
+from django.core.cache import CacheKeyWarning, cache
+from django.test import TestCase
+from common.search import PrefixSearch
+
+RESULTS = {
+    "common": [{"name": "Chicken"}, {"name": "Chickpeas"}, {"name": "Chia Seeds"}],
+}
+
+
+class TestPrefixSearch(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_longer_query_filters_complete_prefix_result(self):
+        search = Mock(return_value=(RESULTS, True))
+        prefix_search = PrefixSearch("test", search)
+
+        self.assertEqual(prefix_search.search("Chi"), RESULTS)
+        self.assertEqual(
+            prefix_search.search("chick"),
+            {"common": [{"name": "Chicken"}, {"name": "Chickpeas"}]},
+        )
+        self.assertEqual(
+            prefix_search.search("chicke"), {"common": [{"name": "Chicken"}]}
+        )
+        search.assert_called_once_with("chi")
+
+    def test_empty_filtered_result_is_searched_again(self):
+        search = Mock(return_value=(RESULTS, True))
+        prefix_search = PrefixSearch("test", search)
+
+        prefix_search.search("chi")
+        search.return_value = ({"common": [{"name": "Chives"}]}, False)
+
+        self.assertEqual(prefix_search.search("chiv"), {"common": [{"name": "Chives"}]})
+        self.assertEqual(
+            [call.args for call in search.call_args_list], [("chi",), ("chiv",)]
+        )
+
+    def test_incomplete_prefix_result_is_not_filtered(self):
+        search = Mock(return_value=(RESULTS, False))
+        prefix_search = PrefixSearch("test", search)
+
+        prefix_search.search("chi")
+        prefix_search.search("chic")
+        prefix_search.search("chic")
+
+        self.assertEqual(
+            [call.args for call in search.call_args_list], [("chi",), ("chic",)]
+        )
+
+    def test_cache_key_is_valid_for_any_query(self):
+        prefix_search = PrefixSearch("test", Mock())
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            cache.validate_key(prefix_search.get_cache_key("greek yogurt " * 30))
+
+    def test_failed_search_is_not_cached(self):
+        search = Mock(return_value=(None, False))
+        prefix_search = PrefixSearch("test", search)
+
+        self.assertIsNone(prefix_search.search("chi"))
+        prefix_search.search("chi")
+        self.assertEqual(search.call_count, 2)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("<str:job_id>/", views.GraphJobAPIView.as_view(), name="graph_job"),
+]
@@ -0,0 +1,22 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from common.graph_pool import get_graph_job
+
+
+class GraphJobAPIView(APIView):
+    """Polls a graph render job submitted with ?format=async"""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        job = get_graph_job(kwargs["job_id"])
+        if job is None:
+            return Response(
+                data={"detail": "Unknown or failed graph job."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if job["status"] == "pending":
+            return Response(data=job, status=status.HTTP_202_ACCEPTED)
+        return Response(data=job, status=status.HTTP_200_OK)
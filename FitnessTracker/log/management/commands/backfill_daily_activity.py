@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from log.models import DailyActivity
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the daily activity index from the workout and weight logs"
+
+    def handle(self, *args, **options):
+        total = 0
+        for user in User.objects.all():
+            total += DailyActivity.rebuild(user)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt daily activity for {total} days")
+        )
@@ -0,0 +1,95 @@
+# Generated by Django 4.2 on 2026-10-18 04:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+# Copies of the log.models activity flags, migrations can't import the models
+WORKOUT_ACTIVITY = 1
+WEIGHT_ACTIVITY = 2
+
+
+def backfill_daily_activity(apps, schema_editor):
+    """Builds every existing user's activity index, as DailyActivity.rebuild does"""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    DailyActivity = apps.get_model("log", "DailyActivity")
+    WorkoutLog = apps.get_model("log", "WorkoutLog")
+    WeightLog = apps.get_model("log", "WeightLog")
+
+    for user_id in User.objects.values_list("id", flat=True).iterator():
+        days = {}
+
+        def get_day(day):
+            if day not in days:
+                days[day] = DailyActivity(user_id=user_id, date=day)
+            return days[day]
+
+        workout_days = (
+            WorkoutLog.objects.filter(user_id=user_id)
+            .values("date")
+            .annotate(
+                workout_count=Count("id", distinct=True),
+                workout_volume=Coalesce(
+                    Sum(F("workout_sets__weight") * F("workout_sets__reps")), 0.0
+                ),
+            )
+        )
+        for row in workout_days:
+            daily_activity = get_day(row["date"])
+            daily_activity.workout_count = row["workout_count"]
+            daily_activity.workout_volume = row["workout_volume"]
+
+        for day, body_weight in WeightLog.objects.filter(user_id=user_id).values_list(
+            "date", "body_weight"
+        ):
+            get_day(day).body_weight = body_weight
+
+        for daily_activity in days.values():
+            daily_activity.activity = (
+                WORKOUT_ACTIVITY if daily_activity.workout_count else 0
+            ) | (WEIGHT_ACTIVITY if daily_activity.body_weight is not None else 0)
+        DailyActivity.objects.bulk_create(days.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("log", "0005_alter_fooditem_carbs_alter_fooditem_fat_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("activity", models.PositiveSmallIntegerField(default=0)),
+                ("workout_count", models.PositiveIntegerField(default=0)),
+                ("workout_volume", models.FloatField(default=0)),
+                ("body_weight", models.FloatField(blank=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_activity",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "date")},
+            },
+        ),
+        migrations.RunPython(backfill_daily_activity, migrations.RunPython.noop),
+    ]
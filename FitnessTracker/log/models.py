@@ -1,5 +1,7 @@
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Sum, Prefetch
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from workout.models import Exercise, Workout, WorkoutSettings
 from .validators import (
@@ -11,11 +13,17 @@ from .validators import (
 from users.models import User, UserSettings
 from datetime import timedelta
 from django.utils import timezone
+from cardio.models import CardioDailyRollup
 from cardio.utils import format_duration
 
 
 # Create your models here.
 
+# Bit flags for the kinds of activity logged on a day
+WORKOUT_ACTIVITY = 1
+WEIGHT_ACTIVITY = 2
+CARDIO_ACTIVITY = 4
+
 
 class WorkoutLog(models.Model):
     workout = models.ForeignKey(Workout, on_delete=models.CASCADE)
@@ -56,6 +64,16 @@ class WorkoutLog(models.Model):
     def get_logs(cls, user, year, month):
         return cls.objects.filter(user=user, date__year=year, date__month=month)
 
+    @staticmethod
+    def prefetch_sets(workout_logs):
+        """Loads the workouts and sets with their exercises to serialize logs in bulk"""
+        return workout_logs.select_related("workout").prefetch_related(
+            Prefetch(
+                "workout_sets",
+                queryset=WorkoutSet.objects.select_related("exercise").order_by("pk"),
+            )
+        )
+
 
 class WorkoutSet(models.Model):
     workout_log = models.ForeignKey(
@@ -78,6 +96,78 @@ class WorkoutSet(models.Model):
         if user_workout_settings and user_workout_settings.auto_update_five_rep_max:
             self.exercise.update_five_rep_max(self.weight, self.reps)
 
+    @classmethod
+    def bulk_create_sets(cls, user, workout_sets):
+        """
+        Validates and inserts sets in a single statement, then updates the five rep max
+        of each exercise at most once using its heaviest set.
+        """
+        cls.validate_sets(workout_sets)
+        workout_sets = cls.objects.bulk_create(workout_sets)
+        cls.update_five_rep_maxes(user, workout_sets)
+        return workout_sets
+
+    @classmethod
+    def bulk_sync_sets(cls, user, existing_sets, workout_sets):
+        """
+        Makes existing_sets match workout_sets position by position, so only the sets
+        that changed are written: one bulk update, one bulk insert for added sets and
+        one delete for removed ones. The five rep max is checked for written sets only.
+        """
+        # Validating first also converts the incoming values for the comparison
+        cls.validate_sets(workout_sets)
+        changed_sets = []
+        for existing_set, workout_set in zip(existing_sets, workout_sets):
+            if (
+                existing_set.exercise_id != workout_set.exercise_id
+                or existing_set.reps != workout_set.reps
+                or existing_set.weight != workout_set.weight
+            ):
+                existing_set.exercise = workout_set.exercise
+                existing_set.reps = workout_set.reps
+                existing_set.weight = workout_set.weight
+                changed_sets.append(existing_set)
+        new_sets = workout_sets[len(existing_sets) :]
+        removed_sets = existing_sets[len(workout_sets) :]
+
+        if changed_sets:
+            cls.objects.bulk_update(changed_sets, ["exercise", "reps", "weight"])
+        if new_sets:
+            new_sets = cls.objects.bulk_create(new_sets)
+        if removed_sets:
+            cls.objects.filter(
+                pk__in=[workout_set.pk for workout_set in removed_sets]
+            ).delete()
+
+        if changed_sets or new_sets:
+            cls.update_five_rep_maxes(user, changed_sets + new_sets)
+        return changed_sets, new_sets, removed_sets
+
+    @staticmethod
+    def validate_sets(workout_sets):
+        for workout_set in workout_sets:
+            # Related objects are already resolved, skip their existence queries
+            workout_set.full_clean(exclude=["workout_log", "exercise"])
+
+    @staticmethod
+    def update_five_rep_maxes(user, workout_sets):
+        """Updates the five rep max of each exercise at most once using its best set"""
+        user_workout_settings = WorkoutSettings.objects.filter(user=user).first()
+        if user_workout_settings and user_workout_settings.auto_update_five_rep_max:
+            best_sets = {}
+            for workout_set in workout_sets:
+                five_rep_max = Exercise.calculate_five_rep_max(
+                    workout_set.weight, workout_set.reps
+                )
+                best = best_sets.get(workout_set.exercise_id)
+                if best is None or five_rep_max > best[0]:
+                    best_sets[workout_set.exercise_id] = (five_rep_max, workout_set)
+
+            for _, workout_set in best_sets.values():
+                workout_set.exercise.update_five_rep_max(
+                    workout_set.weight, workout_set.reps
+                )
+
 
 class CardioLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -117,14 +207,44 @@ class WeightLog(models.Model):
     date = models.DateField()
 
     def save(self, *args, **kwargs):
+        """
+        Keeps the user's current body weight and fat in sync with their latest log.
+        The latest log's date is tracked on the settings, so saving a back-dated log
+        costs no extra queries unless it moves the latest log back.
+        """
+        user_settings = UserSettings.get_user_settings(self.user_id)
+        latest_date = user_settings.latest_weight_log_date
+        log_date = self._meta.get_field("date").to_python(self.date)
+        moved_back = (
+            latest_date is not None
+            and log_date < latest_date
+            and self.pk is not None
+            and WeightLog.objects.filter(pk=self.pk, date=latest_date).exists()
+        )
+
         super().save(*args, **kwargs)
-        if self.date == timezone.now().date():
-            weight_log = self
-        else:
-            weight_log = (
-                WeightLog.objects.filter(user=self.user).order_by("-date").first()
+
+        if latest_date is not None and log_date >= latest_date:
+            UserSettings.update(self.user, self.body_weight, self.body_fat, log_date)
+        elif latest_date is None or moved_back:
+            self.update_user_settings(self.user)
+
+    def delete(self, *args, **kwargs):
+        user_settings = UserSettings.get_user_settings(self.user_id)
+        was_latest = user_settings.latest_weight_log_date == self.date
+        result = super().delete(*args, **kwargs)
+        if was_latest:
+            self.update_user_settings(self.user)
+        return result
+
+    @classmethod
+    def update_user_settings(cls, user):
+        """Sets the user's body weight and fat from their latest log"""
+        weight_log = cls.objects.filter(user=user).order_by("-date").first()
+        if weight_log is not None:
+            UserSettings.update(
+                user, weight_log.body_weight, weight_log.body_fat, weight_log.date
             )
-        UserSettings.update(self.user, weight_log.body_weight, weight_log.body_fat)
 
     class Meta:
         unique_together = ("user", "date")
@@ -134,6 +254,143 @@ class WeightLog(models.Model):
         return cls.objects.filter(user=user, date__year=year, date__month=month)
 
 
+class DailyActivity(models.Model):
+    """
+    Per user index of the workouts and weight logged on each day, kept in sync by
+    signals in log.signals. Days are local dates, matching the get_logs filters of
+    each log. Cardio totals are read from cardio's CardioDailyRollup.
+    """
+
+    HEATMAP_FIELDS = ["activity", "workout_volume", "cardio_distance", "body_weight"]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="daily_activity"
+    )
+    date = models.DateField()
+    activity = models.PositiveSmallIntegerField(default=0)
+    workout_count = models.PositiveIntegerField(default=0)
+    workout_volume = models.FloatField(default=0)
+    body_weight = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("user", "date")
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}"
+
+    @classmethod
+    def get_day_totals(cls, log_model, user_id, day):
+        """Returns the index fields computed from a single log model's logs for a day"""
+        if log_model is WorkoutLog:
+            return WorkoutLog.objects.filter(user_id=user_id, date=day).aggregate(
+                workout_count=Count("id", distinct=True),
+                workout_volume=Coalesce(
+                    Sum(F("workout_sets__weight") * F("workout_sets__reps")), 0.0
+                ),
+            )
+        return {
+            "body_weight": WeightLog.objects.filter(user_id=user_id, date=day)
+            .values_list("body_weight", flat=True)
+            .first()
+        }
+
+    @classmethod
+    def update_day(cls, log_model, user_id, day):
+        """
+        Recomputes the fields of a user's day that come from the given log model,
+        the other log types' fields are left as they are.
+        """
+        daily_activity = cls.objects.filter(user_id=user_id, date=day).first()
+        if daily_activity is None:
+            daily_activity = cls(user_id=user_id, date=day)
+
+        for field, value in cls.get_day_totals(log_model, user_id, day).items():
+            setattr(daily_activity, field, value)
+        daily_activity.set_activity()
+
+        if daily_activity.activity:
+            daily_activity.save()
+        elif daily_activity.pk is not None:
+            daily_activity.delete()
+        return daily_activity
+
+    def set_activity(self):
+        self.activity = (WORKOUT_ACTIVITY if self.workout_count else 0) | (
+            WEIGHT_ACTIVITY if self.body_weight is not None else 0
+        )
+
+    @classmethod
+    def rebuild(cls, user):
+        """Replaces all of a user's activity with totals computed from their logs in bulk"""
+        days = {}
+
+        def get_day(day):
+            if day not in days:
+                days[day] = cls(user=user, date=day)
+            return days[day]
+
+        workout_days = (
+            WorkoutLog.objects.filter(user=user)
+            .values("date")
+            .annotate(
+                workout_count=Count("id", distinct=True),
+                workout_volume=Coalesce(
+                    Sum(F("workout_sets__weight") * F("workout_sets__reps")), 0.0
+                ),
+            )
+        )
+        for row in workout_days:
+            daily_activity = get_day(row["date"])
+            daily_activity.workout_count = row["workout_count"]
+            daily_activity.workout_volume = row["workout_volume"]
+
+        for day, body_weight in WeightLog.objects.filter(user=user).values_list(
+            "date", "body_weight"
+        ):
+            get_day(day).body_weight = body_weight
+
+        for daily_activity in days.values():
+            daily_activity.set_activity()
+
+        with transaction.atomic():
+            cls.objects.filter(user=user).delete()
+            cls.objects.bulk_create(days.values(), batch_size=1000)
+
+        return len(days)
+
+    @classmethod
+    def get_logs(cls, user, start, end):
+        return cls.objects.filter(user=user, date__range=[start, end])
+
+    @classmethod
+    def get_heatmap(cls, user, end, days=365):
+        """
+        Returns a row of HEATMAP_FIELDS for every day in the days ending on end,
+        days without activity are zero filled. Cardio distances are merged in from
+        the user's cardio rollups.
+        """
+        start = end - timedelta(days=days - 1)
+        rows = [[0, 0, 0, None] for _ in range(days)]
+        for day, activity, workout_volume, body_weight in cls.get_logs(
+            user, start, end
+        ).values_list("date", "activity", "workout_volume", "body_weight"):
+            rows[(day - start).days] = [activity, workout_volume, 0, body_weight]
+
+        for day, total_distance in CardioDailyRollup.objects.filter(
+            user=user, date__range=[start, end], count__gt=0
+        ).values_list("date", "total_distance"):
+            row = rows[(day - start).days]
+            row[0] |= CARDIO_ACTIVITY
+            row[2] = total_distance
+
+        return {
+            "start": start,
+            "end": end,
+            "fields": cls.HEATMAP_FIELDS,
+            "days": rows,
+        }
+
+
 class FoodLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="food_logs")
     date = models.DateField()
@@ -87,44 +87,62 @@ class WorkoutLogSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         workout_log_data = self.extract_workout_log_data(validated_data)
         with transaction.atomic():
-            workout_log = WorkoutLog.objects.create(**workout_log_data)
+            workout_log = WorkoutLog(**workout_log_data)
+            # The log has no sets yet, its day is indexed by the save after them
+            workout_log._skip_activity_update = True
+            workout_log.save()
             self.handle_workout_sets_creation(
                 workout_log, validated_data.get("workout_exercises", [])
             )
+            workout_log._skip_activity_update = False
             self.validate_and_save(workout_log)
             return workout_log
 
     def update(self, instance, validated_data):
         with transaction.atomic():
-            self.delete_workout_sets(instance)
-            self.handle_workout_sets_creation(
+            self.handle_workout_sets_update(
                 instance, validated_data.get("workout_exercises", [])
             )
             instance.total_time = validated_data.get("total_time")
             self.validate_and_save(instance)
         return instance
 
-    def delete_workout_sets(self, instance):
-        WorkoutSet.objects.filter(workout_log=instance).delete()
-
     def handle_workout_sets_creation(self, workout_log, workout_exercises):
+        WorkoutSet.bulk_create_sets(
+            workout_log.user, self.get_workout_sets(workout_log, workout_exercises)
+        )
+
+    def handle_workout_sets_update(self, workout_log, workout_exercises):
+        existing_sets = list(workout_log.workout_sets.order_by("pk"))
+        WorkoutSet.bulk_sync_sets(
+            workout_log.user,
+            existing_sets,
+            self.get_workout_sets(workout_log, workout_exercises),
+        )
+
+    def get_workout_sets(self, workout_log, workout_exercises):
+        exercises = Exercise.get_exercises(
+            workout_log.user,
+            [name for exercise in workout_exercises for name in exercise],
+        )
+        workout_sets = []
         for exercise in workout_exercises:
             ((exercise_name, sets),) = exercise.items()
-            exercise, _ = Exercise.objects.get_or_create(
-                user=workout_log.user, name=exercise_name
+            workout_sets.extend(
+                self.build_workout_sets(workout_log, exercises[exercise_name], sets)
             )
-            self.create_workout_sets(workout_log, exercise, sets)
+        return workout_sets
 
-    def create_workout_sets(self, workout_log, exercise, sets):
-        for rep, weight in zip(sets["reps"], sets["weights"]):
-            workout_set = WorkoutSet(
+    def build_workout_sets(self, workout_log, exercise, sets):
+        return [
+            WorkoutSet(
                 workout_log=workout_log,
                 exercise=exercise,
                 reps=rep,
                 weight=weight,
             )
-            workout_set.full_clean()
-            workout_set.save()
+            for rep, weight in zip(sets["reps"], sets["weights"])
+        ]
 
     def validate_and_save(self, instance):
         try:
@@ -146,6 +164,24 @@ class WorkoutLogSerializer(serializers.ModelSerializer):
         fields = ["workout", "user", "date", "total_time", "workout_sets"]
 
 
+class WorkoutDraftSerializer(serializers.Serializer):
+    workout_name = serializers.CharField(max_length=100)
+    date = serializers.DateField(
+        required=False,
+        validators=[validate_not_future_date, validate_not_more_than_5_years_ago],
+    )
+
+
+class WorkoutDraftSetSerializer(serializers.Serializer):
+    exercise = serializers.CharField(max_length=100)
+    reps = serializers.IntegerField(min_value=0, max_value=100)
+    weight = serializers.FloatField(min_value=0.0, max_value=1500.0)
+
+
+class WorkoutDraftCommitSerializer(serializers.Serializer):
+    total_time = serializers.IntegerField(min_value=0, required=False)
+
+
 class CardioLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = CardioLog
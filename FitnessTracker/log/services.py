@@ -0,0 +1,613 @@
+import csv
+import io
+import json
+import math
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from cardio.services import rebuild_cardio_rollups
+from nutrition_tracker.models import Food
+from users.models import UserSettings
+from workout.models import Exercise, Workout
+from .models import (
+    WorkoutLog,
+    WorkoutSet,
+    CardioLog,
+    WeightLog,
+    FoodLog,
+    FoodItem,
+    DailyActivity,
+)
+from .serializers import WorkoutLogSerializer
+from .utils import Calendar
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = [
+    "type",
+    "date",
+    "workout",
+    "log_id",
+    "name",
+    "weight",
+    "reps",
+    "duration",
+    "distance",
+    "body_weight",
+    "body_fat",
+    "calories",
+    "protein",
+    "carbs",
+    "fat",
+]
+
+
+def iter_export_rows(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields every workout set, cardio, weight and food log of a user as flat dicts.
+    Workout set rows carry the id of their log, so the sets of separate logs of the
+    same workout on a day stay apart, logs without sets are yielded as a single row
+    without set fields.
+
+    Each log type is read with a server side cursor in chunks of chunk_size, so only
+    one chunk is held in memory however much history the user has.
+    """
+    # Read from the logs so the left join keeps logs that have no sets
+    workout_sets = (
+        WorkoutLog.objects.filter(user=user)
+        .order_by("date", "pk", "workout_sets__pk")
+        .values_list(
+            "date",
+            "workout__name",
+            "workout_sets__exercise__name",
+            "workout_sets__weight",
+            "workout_sets__reps",
+            "total_time",
+            "workout_sets__pk",
+            "pk",
+        )
+    )
+    for (
+        date,
+        workout,
+        name,
+        weight,
+        reps,
+        total_time,
+        set_pk,
+        log_id,
+    ) in workout_sets.iterator(chunk_size=chunk_size):
+        row = {
+            "type": "workout_set",
+            "date": date,
+            "workout": workout,
+            "log_id": log_id,
+            "duration": total_time.total_seconds(),
+        }
+        if set_pk is not None:
+            row.update({"name": name, "weight": weight, "reps": reps})
+        yield row
+
+    cardio_logs = (
+        CardioLog.objects.filter(user=user)
+        .order_by("datetime")
+        .values_list("datetime", "duration", "distance")
+    )
+    for datetime, duration, distance in cardio_logs.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "cardio",
+            "date": timezone.localtime(datetime),
+            "duration": duration.total_seconds(),
+            "distance": distance,
+        }
+
+    weight_logs = (
+        WeightLog.objects.filter(user=user)
+        .order_by("date")
+        .values_list("date", "body_weight", "body_fat")
+    )
+    for date, body_weight, body_fat in weight_logs.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "weight",
+            "date": date,
+            "body_weight": body_weight,
+            "body_fat": body_fat,
+        }
+
+    food_items = (
+        FoodItem.objects.filter(log_entry__user=user)
+        .order_by("log_entry__date", "pk")
+        .values_list("log_entry__date", "name", "calories", "protein", "carbs", "fat")
+    )
+    for date, name, calories, protein, carbs, fat in food_items.iterator(
+        chunk_size=chunk_size
+    ):
+        yield {
+            "type": "food",
+            "date": date,
+            "name": name,
+            "calories": calories,
+            "protein": protein,
+            "carbs": carbs,
+            "fat": fat,
+        }
+
+
+class Echo:
+    """File-like object that returns what is written, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
+
+
+IMPORT_BATCH_SIZE = 500
+WORKOUT_SET_FIELDS = ("name", "weight", "reps")
+
+
+class LogImportError(Exception):
+    """Raised when an import file can't be parsed into rows"""
+
+
+def parse_import_file(import_file):
+    """
+    Returns the rows of an uploaded csv or json import file as a list of dicts, json
+    files hold a list of row objects like the ndjson export, one per line or in a list.
+    """
+    try:
+        content = import_file.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise LogImportError("Import files must be UTF-8 encoded.")
+
+    if import_file.name.lower().endswith(".csv"):
+        return list(csv.DictReader(io.StringIO(content)))
+
+    try:
+        rows = json.loads(content)
+    except json.JSONDecodeError:
+        try:
+            rows = [json.loads(line) for line in content.splitlines() if line.strip()]
+        except json.JSONDecodeError:
+            raise LogImportError("Import files must be csv, json or ndjson.")
+
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise LogImportError("Import files must contain a list of rows.")
+    return rows
+
+
+class LogImporter:
+    """
+    Imports rows in the export format in batches. Each batch is validated with the
+    log models' validators and written with bulk_create, invalid rows are reported
+    by their 1-based position instead of aborting the import.
+
+    bulk_create skips the log signals, so the cardio rollups, activity index, cached
+    calendar months and user settings are refreshed once after the import, and
+    imported food items are added to the food catalog per batch.
+    """
+
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self.created = {
+            "workout_log": 0,
+            "workout_set": 0,
+            "cardio": 0,
+            "weight": 0,
+            "food": 0,
+        }
+        self.errors = []
+        self.months = set()
+
+    def run(self, rows):
+        handlers = {
+            "workout_set": self.import_workout_sets,
+            "cardio": self.import_cardio_logs,
+            "weight": self.import_weight_logs,
+            "food": self.import_food_items,
+        }
+        for batch in self.get_batches(rows):
+            rows_by_type = {row_type: [] for row_type in handlers}
+            for number, row in batch:
+                row_type = row.get("type")
+                if row_type in rows_by_type:
+                    rows_by_type[row_type].append((number, row))
+                else:
+                    self.add_error(number, {"type": ["Unsupported row type."]})
+
+            with transaction.atomic():
+                for row_type, typed_rows in rows_by_type.items():
+                    if typed_rows:
+                        handlers[row_type](typed_rows)
+
+        self.refresh_derived_data()
+        return {"created": self.created, "errors": self.errors}
+
+    def get_batches(self, rows):
+        """Yields numbered batches, never splitting the sets of one workout log"""
+        batch = []
+        for number, row in enumerate(rows, start=1):
+            if len(batch) >= self.batch_size and not (
+                row.get("type") == "workout_set"
+                and self.get_workout_key(batch[-1][1]) == self.get_workout_key(row)
+            ):
+                yield batch
+                batch = []
+            batch.append((number, row))
+        if batch:
+            yield batch
+
+    def add_error(self, number, error):
+        if isinstance(error, ValidationError):
+            error = (
+                error.message_dict if hasattr(error, "error_dict") else error.messages
+            )
+        self.errors.append({"row": number, "errors": error})
+
+    def validate(self, instance, exclude):
+        instance.full_clean(exclude=exclude, validate_unique=False)
+
+    @staticmethod
+    def get_workout_key(row):
+        if row.get("type") != "workout_set":
+            return None
+        # Files without log ids, like older exports, group sets by their log fields
+        if row.get("log_id") not in (None, ""):
+            return str(row["log_id"])
+        return row.get("date"), row.get("workout"), row.get("duration")
+
+    @staticmethod
+    def has_workout_set(row):
+        """Returns False for the row of a workout log exported without sets"""
+        return any(row.get(field) not in (None, "") for field in WORKOUT_SET_FIELDS)
+
+    @staticmethod
+    def get_value(row, field, convert=str):
+        value = row.get(field)
+        if value in (None, ""):
+            raise ValidationError({field: ["This field is required."]})
+        try:
+            converted = convert(value)
+        except (TypeError, ValueError, OverflowError):
+            converted = None
+        if converted is None or (
+            isinstance(converted, float) and not math.isfinite(converted)
+        ):
+            raise ValidationError({field: ["Enter a valid value."]})
+        return converted
+
+    @classmethod
+    def get_name(cls, row, field):
+        name = cls.get_value(row, field).strip()
+        if not name:
+            raise ValidationError({field: ["This field is required."]})
+        return name
+
+    @staticmethod
+    def to_date(value):
+        return parse_date(str(value)[:10])
+
+    @staticmethod
+    def to_datetime(value):
+        value = parse_datetime(str(value))
+        if value is not None and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    @staticmethod
+    def to_duration(value):
+        return timedelta(seconds=float(value))
+
+    def import_workout_sets(self, rows):
+        groups = {}
+        for number, row in rows:
+            groups.setdefault(self.get_workout_key(row), []).append((number, row))
+
+        # Workouts and exercises are resolved, creating missing ones, only for the
+        # names of rows that passed validation
+        workout_logs, group_sets = [], []
+        for group_rows in groups.values():
+            number, row = group_rows[0]
+            try:
+                workout_name = self.get_name(row, "workout")
+                workout_log = WorkoutLog(
+                    user=self.user,
+                    date=self.get_value(row, "date", self.to_date),
+                    total_time=self.get_value(row, "duration", self.to_duration),
+                )
+                self.validate(workout_log, exclude=["user", "workout"])
+            except ValidationError as e:
+                for number, _ in group_rows:
+                    self.add_error(number, e)
+                continue
+
+            workout_sets = []
+            for number, row in group_rows:
+                if not self.has_workout_set(row):
+                    continue
+                try:
+                    exercise_name = self.get_name(row, "name")
+                    workout_set = WorkoutSet(
+                        workout_log=workout_log,
+                        weight=self.get_value(row, "weight", float),
+                        reps=self.get_value(row, "reps", int),
+                    )
+                    self.validate(workout_set, exclude=["workout_log", "exercise"])
+                    workout_sets.append((exercise_name, workout_set))
+                except ValidationError as e:
+                    self.add_error(number, e)
+
+            if workout_sets or not all(
+                self.has_workout_set(row) for _, row in group_rows
+            ):
+                workout_logs.append((workout_name, workout_log))
+                group_sets.append(workout_sets)
+
+        workouts = Workout.get_workouts(self.user, {name for name, _ in workout_logs})
+        exercises = Exercise.get_exercises(
+            self.user, {name for sets in group_sets for name, _ in sets}
+        )
+        for name, workout_log in workout_logs:
+            workout_log.workout = workouts[name]
+        workout_sets = []
+        for sets in group_sets:
+            for name, workout_set in sets:
+                workout_set.exercise = exercises[name]
+                workout_sets.append(workout_set)
+
+        WorkoutLog.objects.bulk_create(log for _, log in workout_logs)
+        WorkoutSet.objects.bulk_create(workout_sets)
+        self.months.update((log.date.year, log.date.month) for _, log in workout_logs)
+        self.created["workout_log"] += len(workout_logs)
+        self.created["workout_set"] += len(workout_sets)
+
+    def import_cardio_logs(self, rows):
+        cardio_logs = []
+        for number, row in rows:
+            try:
+                cardio_log = CardioLog(
+                    user=self.user,
+                    datetime=self.get_value(row, "date", self.to_datetime),
+                    duration=self.get_value(row, "duration", self.to_duration),
+                    distance=self.get_value(row, "distance", float),
+                )
+                self.validate(cardio_log, exclude=["user"])
+                cardio_logs.append(cardio_log)
+            except ValidationError as e:
+                self.add_error(number, e)
+
+        CardioLog.objects.bulk_create(cardio_logs)
+        for cardio_log in cardio_logs:
+            day = timezone.localtime(cardio_log.datetime)
+            self.months.add((day.year, day.month))
+        self.created["cardio"] += len(cardio_logs)
+
+    def import_weight_logs(self, rows):
+        weight_logs = {}
+        for number, row in rows:
+            try:
+                weight_log = WeightLog(
+                    user=self.user,
+                    date=self.get_value(row, "date", self.to_date),
+                    body_weight=self.get_value(row, "body_weight", float),
+                    body_fat=self.get_value(row, "body_fat", float),
+                )
+                self.validate(weight_log, exclude=["user"])
+            except ValidationError as e:
+                self.add_error(number, e)
+                continue
+
+            if weight_log.date in weight_logs:
+                self.add_error(
+                    number, {"date": ["Weight is already logged for this date."]}
+                )
+            else:
+                weight_logs[weight_log.date] = (number, weight_log)
+
+        existing_dates = set(
+            WeightLog.objects.filter(
+                user=self.user, date__in=list(weight_logs)
+            ).values_list("date", flat=True)
+        )
+        for day in existing_dates:
+            number, _ = weight_logs.pop(day)
+            self.add_error(
+                number, {"date": ["Weight is already logged for this date."]}
+            )
+
+        WeightLog.objects.bulk_create(log for _, log in weight_logs.values())
+        self.months.update((day.year, day.month) for day in weight_logs)
+        self.created["weight"] += len(weight_logs)
+
+    def import_food_items(self, rows):
+        food_items = []
+        for number, row in rows:
+            try:
+                food_item = FoodItem(
+                    name=self.get_name(row, "name"),
+                    calories=self.get_value(row, "calories", int),
+                    protein=self.get_value(row, "protein", float),
+                    carbs=self.get_value(row, "carbs", float),
+                    fat=self.get_value(row, "fat", float),
+                )
+                self.validate(food_item, exclude=["log_entry"])
+                food_items.append(
+                    (self.get_value(row, "date", self.to_date), food_item)
+                )
+            except ValidationError as e:
+                self.add_error(number, e)
+
+        dates = {day for day, _ in food_items}
+        food_logs = {
+            food_log.date: food_log
+            for food_log in FoodLog.objects.filter(user=self.user, date__in=dates)
+        }
+        new_food_logs = [
+            FoodLog(user=self.user, date=day) for day in dates - food_logs.keys()
+        ]
+        FoodLog.objects.bulk_create(new_food_logs)
+        food_logs.update((food_log.date, food_log) for food_log in new_food_logs)
+
+        for day, food_item in food_items:
+            food_item.log_entry = food_logs[day]
+        FoodItem.objects.bulk_create(food_item for _, food_item in food_items)
+        Food.record_logged(food_item for _, food_item in food_items)
+        self.created["food"] += len(food_items)
+
+    def refresh_derived_data(self):
+        if self.created["cardio"]:
+            rebuild_cardio_rollups(self.user)
+        if (
+            self.created["workout_log"]
+            or self.created["cardio"]
+            or self.created["weight"]
+        ):
+            DailyActivity.rebuild(self.user)
+        for year, month in self.months:
+            Calendar.invalidate_month(self.user.id, year, month)
+
+        # Settings track the latest weight log, updated once instead of per log
+        if self.created["weight"]:
+            WeightLog.update_user_settings(self.user)
+
+
+WORKOUT_DRAFT_TIMEOUT = 60 * 60 * 24
+
+
+class WorkoutDraftError(Exception):
+    """Raised when there is no workout draft or a patch does not apply to it"""
+
+
+class WorkoutDraftIncompleteError(WorkoutDraftError):
+    """Raised when some of a workout draft's sets are no longer in the cache"""
+
+
+class WorkoutLogDraft:
+    """
+    Keeps a user's in-progress workout session in the workout drafts cache until
+    it is committed. Every set is stored under its own key and the set count is a
+    counter, so appending or editing a set costs the same however long the session
+    gets. The draft is written to WorkoutLog/WorkoutSet in one bulk write on commit,
+    and a draft missing any of its sets is never read or committed partially.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.cache = caches[settings.WORKOUT_DRAFT_CACHE_ALIAS]
+        self.key = f"workout_draft_{user.id}"
+        self.count_key = f"{self.key}_count"
+
+    def get_set_key(self, index):
+        return f"{self.key}_set_{index}"
+
+    def start(self, workout_name, date=None):
+        """Starts a new draft, replacing any draft the user had in progress"""
+        self.discard()
+        info = {
+            "workout_name": workout_name,
+            "date": (date or timezone.localdate()).isoformat(),
+            "started": timezone.now(),
+        }
+        self.cache.set_many({self.key: info, self.count_key: 0}, WORKOUT_DRAFT_TIMEOUT)
+        return info
+
+    def append_set(self, exercise, reps, weight):
+        """Adds a set to the end of the draft and returns its index"""
+        try:
+            index = self.cache.incr(self.count_key) - 1
+        except ValueError:
+            raise WorkoutDraftError("No workout is in progress.")
+        self.cache.set(
+            self.get_set_key(index),
+            {"exercise": exercise, "reps": reps, "weight": weight},
+            WORKOUT_DRAFT_TIMEOUT,
+        )
+        return index
+
+    def update_set(self, index, **values):
+        set_key = self.get_set_key(index)
+        workout_set = self.cache.get(set_key)
+        if workout_set is None:
+            raise WorkoutDraftError(f"Set {index} is not in the workout in progress.")
+        workout_set.update(values)
+        self.cache.set(set_key, workout_set, WORKOUT_DRAFT_TIMEOUT)
+        return workout_set
+
+    def get(self):
+        """Returns the draft info with its sets in the order they were added"""
+        draft = self.cache.get_many([self.key, self.count_key])
+        if self.key not in draft or self.count_key not in draft:
+            raise WorkoutDraftError("No workout is in progress.")
+
+        set_keys = [self.get_set_key(index) for index in range(draft[self.count_key])]
+        workout_sets = self.cache.get_many(set_keys)
+        if len(workout_sets) != len(set_keys):
+            raise WorkoutDraftIncompleteError(
+                "Some sets of the workout in progress were lost."
+            )
+        return {**draft[self.key], "sets": [workout_sets[key] for key in set_keys]}
+
+    @staticmethod
+    def get_workout_exercises(workout_sets):
+        """Groups consecutive sets of an exercise in the WorkoutLogSerializer format"""
+        workout_exercises = []
+        previous_exercise = None
+        for workout_set in workout_sets:
+            if workout_set["exercise"] != previous_exercise:
+                previous_exercise = workout_set["exercise"]
+                sets = {"reps": [], "weights": []}
+                workout_exercises.append({previous_exercise: sets})
+            sets["reps"].append(workout_set["reps"])
+            sets["weights"].append(workout_set["weight"])
+        return workout_exercises
+
+    def commit(self, context, total_time=None):
+        """
+        Creates the workout log from the draft and discards it. total_time is in
+        seconds and defaults to the time since the draft was started.
+        """
+        draft = self.get()
+        if total_time is None:
+            total_time = (timezone.now() - draft["started"]).total_seconds()
+
+        serializer = WorkoutLogSerializer(
+            data={
+                "workout_name": draft["workout_name"],
+                "date": draft["date"],
+                "total_time": total_time,
+                "workout_exercises": self.get_workout_exercises(draft["sets"]),
+            },
+            context=context,
+        )
+        serializer.is_valid(raise_exception=True)
+        workout_log = serializer.save()
+        self.discard()
+        return workout_log
+
+    def discard(self):
+        count = self.cache.get(self.count_key) or 0
+        self.cache.delete_many(
+            [self.key, self.count_key]
+            + [self.get_set_key(index) for index in range(count)]
+        )
@@ -0,0 +1,84 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from users.models import User
+from .models import WorkoutLog, WeightLog, DailyActivity
+from .utils import Calendar
+
+LOG_DATE_FIELDS = {
+    WorkoutLog: "date",
+    WeightLog: "date",
+}
+
+
+def get_log_day(sender, value):
+    """Returns the local date a log is shown under on the calendar"""
+    value = sender._meta.get_field(LOG_DATE_FIELDS[sender]).to_python(value)
+    if hasattr(value, "tzinfo"):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        value = timezone.localtime(value).date()
+    return value
+
+
+def get_user_day(sender, instance):
+    value = getattr(instance, LOG_DATE_FIELDS[sender])
+    if value is None:
+        return None
+    return instance.user_id, get_log_day(sender, value)
+
+
+def update_user_day(sender, user_day):
+    user_id, day = user_day
+    Calendar.invalidate_month(user_id, day.year, day.month)
+    DailyActivity.update_day(sender, user_id, day)
+
+
+@receiver(pre_save, sender=WorkoutLog)
+@receiver(pre_save, sender=WeightLog)
+def remember_previous_log_day(sender, instance, raw=False, **kwargs):
+    """Remembers the day an updated log was previously logged under"""
+    instance._previous_user_day = None
+    if raw or instance.pk is None:
+        return
+
+    previous = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("user_id", LOG_DATE_FIELDS[sender])
+        .first()
+    )
+    if previous is not None:
+        instance._previous_user_day = (previous[0], get_log_day(sender, previous[1]))
+
+
+@receiver(post_save, sender=WorkoutLog)
+@receiver(post_save, sender=WeightLog)
+def update_log_day_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Invalidates the cached calendar month and recomputes the activity index of the
+    log's day. Workout volume is refreshed when the workout log itself is saved,
+    which the serializer does after its sets are written, skipping the first save
+    made before the log has any sets.
+    """
+    if raw or getattr(instance, "_skip_activity_update", False):
+        return
+
+    user_day = get_user_day(sender, instance)
+    if user_day is not None:
+        update_user_day(sender, user_day)
+
+    previous_user_day = getattr(instance, "_previous_user_day", None)
+    if previous_user_day is not None and previous_user_day != user_day:
+        update_user_day(sender, previous_user_day)
+
+
+@receiver(post_delete, sender=WorkoutLog)
+@receiver(post_delete, sender=WeightLog)
+def update_log_day_on_delete(sender, instance, origin=None, **kwargs):
+    # The user's activity index is removed with them
+    if isinstance(origin, User):
+        return
+
+    user_day = get_user_day(sender, instance)
+    if user_day is not None:
+        update_user_day(sender, user_day)
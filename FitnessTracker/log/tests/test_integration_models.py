@@ -1,4 +1,5 @@
 from datetime import timedelta
+from unittest.mock import patch
 from django.db import IntegrityError
 from django.test import TestCase
 from django.core.exceptions import ValidationError
@@ -128,6 +129,27 @@ class TestWorkoutSet(TestCase):
         self.exercise.refresh_from_db()
         self.assertEqual(initial_five_rep_max, self.exercise.five_rep_max)
 
+    def test_bulk_create_sets_updates_five_rep_max_once(self):
+        """Test that bulk created sets update the five rep max from the heaviest set"""
+        workout_sets = [
+            WorkoutSet(
+                workout_log=self.workout_log, exercise=self.exercise, weight=w, reps=5
+            )
+            for w in [80, 120, 100]
+        ]
+
+        with patch.object(
+            Exercise, "save", autospec=True, side_effect=Exercise.save
+        ) as mock_save:
+            WorkoutSet.bulk_create_sets(self.user, workout_sets)
+
+        mock_save.assert_called_once()
+        self.exercise.refresh_from_db()
+        self.assertEqual(WorkoutSet.objects.count(), 3)
+        self.assertEqual(
+            self.exercise.five_rep_max, Exercise.calculate_five_rep_max(120, 5)
+        )
+
 
 class TestCardioLog(TestCase):
     def setUp(self):
@@ -1,10 +1,23 @@
 from django.test import TestCase
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from datetime import timedelta
 from unittest.mock import patch
-from log.models import WorkoutLog, WorkoutSet, CardioLog, WeightLog, FoodLog, FoodItem
+from datetime import date
+from log.models import (
+    WorkoutLog,
+    WorkoutSet,
+    CardioLog,
+    WeightLog,
+    FoodLog,
+    FoodItem,
+    DailyActivity,
+    WORKOUT_ACTIVITY,
+    WEIGHT_ACTIVITY,
+    CARDIO_ACTIVITY,
+)
 from workout.models import Exercise, Workout, WorkoutSettings
 from users.models import User, UserSettings
 
@@ -99,6 +112,54 @@ class WeightLogTestCase(TestCase):
         self.user_settings = UserSettings.get_user_settings(self.user.id)
         self.assertEqual(self.user_settings.body_weight, 150)
         self.assertEqual(self.user_settings.body_fat, 20)
+        self.assertEqual(self.user_settings.latest_weight_log_date, weight_log.date)
+
+    def test_save_back_dated_weight_log(self):
+        today = timezone.localdate()
+        WeightLog.objects.create(
+            user=self.user, body_weight=150, body_fat=20, date=today
+        )
+        with CaptureQueriesContext(connection) as context:
+            WeightLog.objects.create(
+                user=self.user,
+                body_weight=160,
+                body_fat=25,
+                date=today - timedelta(days=3),
+            )
+        latest_log_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if 'ORDER BY "log_weightlog"."date" DESC' in query["sql"]
+            or "users_usersettings" in query["sql"]
+        ]
+        self.assertEqual(latest_log_queries, [])
+        user_settings = UserSettings.get_user_settings(self.user.id)
+        self.assertEqual(user_settings.body_weight, 150)
+        self.assertEqual(user_settings.latest_weight_log_date, today)
+
+    def test_move_and_delete_latest_weight_log(self):
+        today = timezone.localdate()
+        WeightLog.objects.create(
+            user=self.user, body_weight=150, body_fat=20, date=today - timedelta(days=1)
+        )
+        latest_log = WeightLog.objects.create(
+            user=self.user, body_weight=155, body_fat=21, date=today
+        )
+
+        latest_log.date = today - timedelta(days=2)
+        latest_log.save()
+        user_settings = UserSettings.get_user_settings(self.user.id)
+        self.assertEqual(user_settings.body_weight, 150)
+        self.assertEqual(
+            user_settings.latest_weight_log_date, today - timedelta(days=1)
+        )
+
+        WeightLog.objects.get(date=today - timedelta(days=1)).delete()
+        user_settings = UserSettings.get_user_settings(self.user.id)
+        self.assertEqual(user_settings.body_weight, 155)
+        self.assertEqual(
+            user_settings.latest_weight_log_date, today - timedelta(days=2)
+        )
 
 
 class FoodLogModelTest(TestCase):
@@ -153,3 +214,78 @@ class FoodItemModelTest(TestCase):
         self.food_item.calories = -10
         with self.assertRaises(ValidationError):
             self.food_item.full_clean()
+
+
+class TestDailyActivity(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="activityuser")
+        self.workout = Workout.objects.create(user=self.user, name="Morning Routine")
+        self.exercise = Exercise.objects.create(user=self.user, name="Squat")
+        self.day = date(2024, 4, 10)
+
+    def get_activity(self, day=None):
+        return DailyActivity.objects.get(user=self.user, date=day or self.day)
+
+    def test_index_tracks_each_log_type(self):
+        workout_log = WorkoutLog.objects.create(
+            workout=self.workout, user=self.user, date=self.day
+        )
+        WorkoutSet.objects.create(
+            workout_log=workout_log, exercise=self.exercise, weight=100, reps=5
+        )
+        # Volume is refreshed when the log is saved after its sets
+        workout_log.save()
+        CardioLog.objects.create(
+            user=self.user,
+            datetime=timezone.make_aware(timezone.datetime(2024, 4, 10, 23, 30)),
+            distance=3.5,
+        )
+        WeightLog.objects.create(
+            user=self.user, date=self.day, body_weight=180, body_fat=15
+        )
+
+        activity = self.get_activity()
+        self.assertEqual(activity.activity, WORKOUT_ACTIVITY | WEIGHT_ACTIVITY)
+        self.assertEqual(activity.workout_volume, 500)
+        self.assertEqual(activity.body_weight, 180)
+        # Cardio totals come from the cardio rollups
+        heatmap = DailyActivity.get_heatmap(self.user, self.day, days=1)
+        self.assertEqual(
+            heatmap["days"],
+            [[WORKOUT_ACTIVITY | WEIGHT_ACTIVITY | CARDIO_ACTIVITY, 500, 3.5, 180]],
+        )
+
+    def test_moving_and_deleting_logs_updates_index(self):
+        weight_log = WeightLog.objects.create(
+            user=self.user, date=self.day, body_weight=180, body_fat=15
+        )
+
+        weight_log.date = date(2024, 4, 11)
+        weight_log.save()
+        self.assertFalse(DailyActivity.objects.filter(date=self.day).exists())
+        self.assertEqual(self.get_activity(date(2024, 4, 11)).body_weight, 180)
+
+        weight_log.delete()
+        self.assertFalse(DailyActivity.objects.filter(user=self.user).exists())
+
+    def test_deleting_user_removes_index(self):
+        WorkoutLog.objects.create(workout=self.workout, user=self.user, date=self.day)
+        CardioLog.objects.create(user=self.user, datetime=timezone.now(), distance=3.5)
+
+        self.user.delete()
+
+        self.assertFalse(DailyActivity.objects.exists())
+
+    def test_get_heatmap(self):
+        CardioLog.objects.create(
+            user=self.user,
+            datetime=timezone.make_aware(timezone.datetime(2024, 4, 10, 12)),
+            distance=3.5,
+        )
+
+        heatmap = DailyActivity.get_heatmap(self.user, date(2024, 4, 10))
+
+        self.assertEqual(heatmap["start"], date(2023, 4, 12))
+        self.assertEqual(len(heatmap["days"]), 365)
+        self.assertEqual(heatmap["days"][-1], [CARDIO_ACTIVITY, 0, 3.5, None])
+        self.assertEqual(heatmap["days"][0], [0, 0, 0, None])
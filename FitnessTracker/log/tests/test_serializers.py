@@ -6,18 +6,139 @@ from django.test import TestCase
 from rest_framework.test import APIClient
 from datetime import timedelta
 
-from log.models import WeightLog, FoodLog, FoodItem
+from log.models import WeightLog, FoodLog, FoodItem, WorkoutLog, WorkoutSet
 from log.serializers import (
+    WorkoutLogSerializer,
     WeightLogSerializer,
     CardioLogSerializer,
     FoodItemSerializer,
     FoodLogSerializer,
 )
 from users.models import User
+from workout.models import Exercise, WorkoutSettings
 from common.test_globals import *
 from rest_framework.test import APITestCase
 
 
+class TestWorkoutLogSerializer(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(**CREATE_USER)
+        self.context = {"request": mock.Mock(user=self.user)}
+        WorkoutSettings.objects.create(user=self.user, auto_update_five_rep_max=True)
+
+    def get_data(self, set_count):
+        return {
+            "workout_name": "Push Day",
+            "date": "2024-04-01",
+            "total_time": 3600,
+            "workout_exercises": [
+                {name: {"reps": [5] * set_count, "weights": [100] * set_count}}
+                for name in ["Bench Press", "Overhead Press"]
+            ],
+        }
+
+    def create_workout_log(self, set_count):
+        serializer = WorkoutLogSerializer(
+            data=self.get_data(set_count), context=self.context
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_create_workout_log_with_sets(self):
+        workout_log = self.create_workout_log(3)
+
+        self.assertEqual(workout_log.workout_sets.count(), 6)
+        self.assertEqual(
+            Exercise.objects.get(user=self.user, name="Bench Press").five_rep_max,
+            Exercise.calculate_five_rep_max(100, 5),
+        )
+
+    def test_query_count_does_not_depend_on_set_count(self):
+        # Warm up the workout so both logs resolve it the same way
+        self.create_workout_log(1)
+        WorkoutLog.objects.all().delete()
+
+        with self.assertNumQueries(15):
+            self.create_workout_log(2)
+        WorkoutLog.objects.all().delete()
+
+        with self.assertNumQueries(15):
+            self.create_workout_log(20)
+
+    def test_invalid_set_rolls_back_workout_log(self):
+        data = self.get_data(1)
+        data["workout_exercises"][0]["Bench Press"]["reps"] = [500]
+        serializer = WorkoutLogSerializer(data=data, context=self.context)
+        serializer.is_valid(raise_exception=True)
+
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        self.assertFalse(WorkoutLog.objects.exists())
+
+    def update_workout_log(self, workout_log, data):
+        serializer = WorkoutLogSerializer(workout_log, data=data, context=self.context)
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_update_only_writes_changed_sets(self):
+        workout_log = self.create_workout_log(3)
+        set_ids = list(
+            workout_log.workout_sets.order_by("pk").values_list("pk", flat=True)
+        )
+        data = self.get_data(3)
+        data["workout_exercises"][0]["Bench Press"]["reps"] = [5, 8, 5]
+
+        with mock.patch(
+            "log.models.WorkoutSet.objects.bulk_create"
+        ) as bulk_create, mock.patch(
+            "log.models.WorkoutSet.objects.bulk_update",
+            wraps=WorkoutSet.objects.bulk_update,
+        ) as bulk_update:
+            self.update_workout_log(workout_log, data)
+
+        bulk_create.assert_not_called()
+        ((changed_sets, fields), _) = bulk_update.call_args
+        self.assertEqual([workout_set.pk for workout_set in changed_sets], [set_ids[1]])
+        self.assertEqual(
+            list(workout_log.workout_sets.order_by("pk").values_list("pk", "reps")),
+            [(set_ids[0], 5), (set_ids[1], 8), *[(pk, 5) for pk in set_ids[2:]]],
+        )
+
+    def test_update_adds_and_removes_sets(self):
+        workout_log = self.create_workout_log(2)
+        set_ids = list(
+            workout_log.workout_sets.order_by("pk").values_list("pk", flat=True)
+        )
+        data = self.get_data(2)
+        data["workout_exercises"][0]["Bench Press"] = {
+            "reps": [5, 5, 5],
+            "weights": [100, 100, 120],
+        }
+        del data["workout_exercises"][1]
+
+        self.update_workout_log(workout_log, data)
+
+        workout_sets = list(workout_log.workout_sets.order_by("pk"))
+        self.assertEqual(len(workout_sets), 3)
+        self.assertEqual(
+            [workout_set.pk for workout_set in workout_sets[:2]], set_ids[:2]
+        )
+        self.assertEqual(workout_sets[2].weight, 120)
+        self.assertEqual(
+            Exercise.objects.get(user=self.user, name="Bench Press").five_rep_max,
+            Exercise.calculate_five_rep_max(120, 5),
+        )
+
+    def test_update_without_changes_writes_no_sets(self):
+        workout_log = self.create_workout_log(3)
+
+        with mock.patch("log.models.WorkoutSet.update_five_rep_maxes") as update:
+            self.update_workout_log(workout_log, self.get_data(3))
+
+        update.assert_not_called()
+        self.assertEqual(workout_log.workout_sets.count(), 6)
+
+
 class TestCardioLogSerializer(TestCase):
 
     def setUp(self):
@@ -0,0 +1,395 @@
+import csv
+import json
+from datetime import date, timedelta
+from unittest import mock
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from cardio.models import CardioDailyRollup
+from log.models import (
+    WorkoutLog,
+    WorkoutSet,
+    CardioLog,
+    WeightLog,
+    FoodLog,
+    FoodItem,
+    DailyActivity,
+)
+from log.services import (
+    iter_export_rows,
+    stream_csv,
+    stream_ndjson,
+    EXPORT_FIELDS,
+    parse_import_file,
+    LogImporter,
+    LogImportError,
+    WorkoutLogDraft,
+    WorkoutDraftError,
+    WorkoutDraftIncompleteError,
+)
+from nutrition_tracker.models import Food
+from users.models import User, UserSettings
+from workout.models import Exercise, Workout
+from common.test_globals import CREATE_USER
+
+
+class TestLogExport(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(**CREATE_USER)
+        workout = Workout.objects.create(user=self.user, name="Leg Day")
+        exercise = Exercise.objects.create(user=self.user, name="Squat")
+        workout_log = WorkoutLog.objects.create(
+            user=self.user,
+            workout=workout,
+            date=date(2024, 4, 1),
+            total_time=timedelta(hours=1),
+        )
+        WorkoutSet.objects.bulk_create(
+            WorkoutSet(workout_log=workout_log, exercise=exercise, weight=w, reps=5)
+            for w in [100, 110]
+        )
+        CardioLog.objects.create(
+            user=self.user,
+            datetime=timezone.make_aware(timezone.datetime(2024, 4, 2, 8)),
+            duration=timedelta(minutes=30),
+            distance=3,
+        )
+        WeightLog.objects.create(
+            user=self.user, date=date(2024, 4, 3), body_weight=180, body_fat=15
+        )
+        food_log = FoodLog.objects.create(user=self.user, date=date(2024, 4, 4))
+        FoodItem.objects.create(
+            log_entry=food_log, name="Oats", calories=300, protein=10, carbs=50, fat=5
+        )
+
+    def test_iter_export_rows(self):
+        rows = list(iter_export_rows(self.user, chunk_size=1))
+
+        self.assertEqual(
+            [row["type"] for row in rows],
+            ["workout_set", "workout_set", "cardio", "weight", "food"],
+        )
+        self.assertEqual(rows[1]["weight"], 110)
+        self.assertEqual(rows[1]["duration"], 3600)
+        self.assertEqual(rows[2]["date"].date(), date(2024, 4, 2))
+        self.assertEqual(rows[4]["calories"], 300)
+
+    def test_export_includes_workout_logs_without_sets(self):
+        workout_log = WorkoutLog.objects.create(
+            user=self.user,
+            workout=Workout.objects.get(name="Leg Day"),
+            date=date(2024, 4, 5),
+            total_time=timedelta(minutes=20),
+        )
+
+        row = list(iter_export_rows(self.user))[2]
+
+        self.assertEqual(
+            row,
+            {
+                "type": "workout_set",
+                "date": date(2024, 4, 5),
+                "workout": "Leg Day",
+                "log_id": workout_log.pk,
+                "duration": 1200,
+            },
+        )
+
+    def test_export_excludes_other_users(self):
+        other_user = User.objects.create(username="other", email="other@test.com")
+        self.assertEqual(list(iter_export_rows(other_user)), [])
+
+    def test_stream_csv(self):
+        lines = "".join(stream_csv(iter_export_rows(self.user))).splitlines()
+        rows = list(csv.DictReader(lines))
+
+        self.assertEqual(lines[0], ",".join(EXPORT_FIELDS))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["name"], "Squat")
+        self.assertEqual(rows[3]["body_weight"], "180.0")
+
+    def test_stream_ndjson(self):
+        lines = list(stream_ndjson(iter_export_rows(self.user)))
+        rows = [json.loads(line) for line in lines]
+
+        self.assertTrue(all(line.endswith("\n") for line in lines))
+        self.assertEqual(rows[0]["date"], "2024-04-01")
+        self.assertEqual(rows[4]["name"], "Oats")
+
+
+class TestLogImporter(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(**CREATE_USER)
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def workout_set(self, weight, workout="Leg Day", day=None, **row):
+        return {
+            "type": "workout_set",
+            "date": str(day or self.yesterday),
+            "workout": workout,
+            "name": "squat",
+            "weight": weight,
+            "reps": 5,
+            "duration": 3600,
+            **row,
+        }
+
+    def weight(self, day, body_weight):
+        return {
+            "type": "weight",
+            "date": str(day),
+            "body_weight": body_weight,
+            "body_fat": 15,
+        }
+
+    def test_import_rows(self):
+        rows = [
+            self.workout_set(100),
+            self.workout_set(110),
+            self.workout_set(60, workout="Arm Day"),
+            {
+                "type": "cardio",
+                "date": f"{self.yesterday}T08:00:00",
+                "duration": 1800,
+                "distance": 3,
+            },
+            self.weight(self.yesterday - timedelta(days=1), 185),
+            self.weight(self.yesterday, 180),
+            {
+                "type": "food",
+                "date": str(self.yesterday),
+                "name": "Oats",
+                "calories": 300,
+                "protein": 10,
+                "carbs": 50,
+                "fat": 5,
+            },
+        ]
+
+        report = LogImporter(self.user).run(rows)
+
+        self.assertEqual(report["errors"], [])
+        self.assertEqual(
+            report["created"],
+            {"workout_log": 2, "workout_set": 3, "cardio": 1, "weight": 2, "food": 1},
+        )
+        self.assertEqual(WorkoutLog.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            WorkoutSet.objects.filter(workout_log__workout__name="Leg Day").count(), 2
+        )
+        self.assertTrue(FoodItem.objects.filter(log_entry__user=self.user).exists())
+        self.assertEqual(Food.objects.get(item_id="oats").calories, 300)
+        self.assertEqual(UserSettings.get_user_settings(self.user.id).body_weight, 180)
+        self.assertEqual(
+            DailyActivity.objects.get(
+                user=self.user, date=self.yesterday
+            ).workout_volume,
+            1350,
+        )
+        self.assertTrue(CardioDailyRollup.objects.filter(user=self.user).exists())
+
+    def test_invalid_rows_are_reported(self):
+        WeightLog.objects.create(
+            user=self.user, date=self.yesterday, body_weight=170, body_fat=15
+        )
+        rows = [
+            self.workout_set(100, day=self.today + timedelta(days=2)),
+            self.workout_set("heavy", workout="Arm Day"),
+            self.weight(self.yesterday, 180),
+            self.weight(self.today, 2000),
+            {"type": "cardio", "date": "not a date", "duration": 60, "distance": 1},
+            {"type": "steps"},
+            self.weight(self.today, 175),
+        ]
+
+        report = LogImporter(self.user).run(rows)
+
+        self.assertEqual(
+            [error["row"] for error in report["errors"]], [6, 1, 2, 5, 4, 3]
+        )
+        self.assertIn("date", report["errors"][1]["errors"])
+        self.assertIn("weight", report["errors"][2]["errors"])
+        self.assertEqual(report["created"]["weight"], 1)
+        self.assertFalse(WorkoutLog.objects.exists())
+
+    def test_rejected_rows_do_not_create_workouts_or_exercises(self):
+        rows = [
+            self.workout_set(100, workout="Back Day", name="Deadlift", reps="x"),
+            self.workout_set(100, workout="Arm Day", day="not a date"),
+            self.workout_set(100, workout="Arm Day", name="   "),
+            self.workout_set(100, workout="  ", day=self.today),
+        ]
+
+        report = LogImporter(self.user).run(rows)
+
+        self.assertEqual([error["row"] for error in report["errors"]], [1, 2, 3, 4])
+        self.assertIn("name", report["errors"][2]["errors"])
+        self.assertIn("workout", report["errors"][3]["errors"])
+        self.assertFalse(Workout.objects.filter(user=self.user).exists())
+        self.assertFalse(Exercise.objects.filter(user=self.user).exists())
+
+    def test_out_of_range_numbers_are_reported(self):
+        rows = [
+            self.workout_set(100, duration="1e20"),
+            self.workout_set("inf", workout="Arm Day"),
+            {"type": "cardio", "date": str(self.today), "duration": "inf"},
+        ]
+
+        report = LogImporter(self.user).run(rows)
+
+        self.assertEqual([error["row"] for error in report["errors"]], [1, 2, 3])
+        self.assertIn("duration", report["errors"][0]["errors"])
+        self.assertIn("weight", report["errors"][1]["errors"])
+        self.assertIn("duration", report["errors"][2]["errors"])
+
+    def test_sets_are_grouped_by_log_id(self):
+        rows = [
+            self.workout_set(100, log_id=1),
+            self.workout_set(110, log_id=2),
+            self.workout_set(120, log_id=1),
+        ]
+
+        LogImporter(self.user).run(rows)
+
+        self.assertEqual(
+            sorted(log.workout_sets.count() for log in WorkoutLog.objects.all()),
+            [1, 2],
+        )
+
+    def test_export_round_trip(self):
+        other_user = User.objects.create(username="other", email="other@test.com")
+        workout = Workout.objects.create(user=other_user, name="Leg Day")
+        exercise = Exercise.objects.create(user=other_user, name="Squat")
+        for _ in range(2):
+            workout_log = WorkoutLog.objects.create(
+                user=other_user, workout=workout, date=self.yesterday
+            )
+            WorkoutSet.objects.create(
+                workout_log=workout_log, exercise=exercise, weight=100, reps=5
+            )
+        WorkoutLog.objects.create(user=other_user, workout=workout, date=self.today)
+
+        report = LogImporter(self.user).run(list(iter_export_rows(other_user)))
+
+        self.assertEqual(report["errors"], [])
+        self.assertEqual(report["created"]["workout_log"], 3)
+        self.assertEqual(report["created"]["workout_set"], 2)
+        self.assertEqual(
+            DailyActivity.objects.get(user=self.user, date=self.today).workout_count, 1
+        )
+
+    def test_batches_keep_workout_sets_together(self):
+        importer = LogImporter(self.user, batch_size=2)
+        rows = [self.workout_set(w) for w in [100, 110, 120]] + [
+            self.weight(self.yesterday, 180)
+        ]
+
+        batches = list(importer.get_batches(rows))
+
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+        importer.run(rows)
+        self.assertEqual(WorkoutLog.objects.count(), 1)
+
+    def test_parse_import_file(self):
+        csv_file = SimpleUploadedFile(
+            "logs.csv", b"type,date,body_weight,body_fat\nweight,2024-04-01,180,15\n"
+        )
+        ndjson_file = SimpleUploadedFile(
+            "logs.ndjson", b'{"type": "weight"}\n{"type": "cardio"}\n'
+        )
+
+        self.assertEqual(parse_import_file(csv_file)[0]["body_weight"], "180")
+        self.assertEqual(len(parse_import_file(ndjson_file)), 2)
+        with self.assertRaises(LogImportError):
+            parse_import_file(SimpleUploadedFile("logs.json", b"<xml/>"))
+
+
+class TestWorkoutLogDraft(TestCase):
+    def setUp(self):
+        caches[settings.WORKOUT_DRAFT_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(**CREATE_USER)
+        self.draft = WorkoutLogDraft(self.user)
+        self.context = {"request": mock.Mock(user=self.user)}
+
+    def test_patches_without_draft(self):
+        with self.assertRaises(WorkoutDraftError):
+            self.draft.append_set("Bench Press", 5, 100)
+        with self.assertRaises(WorkoutDraftError):
+            self.draft.get()
+
+    def test_append_and_update_sets(self):
+        self.draft.start("Push Day")
+        self.assertEqual(self.draft.append_set("Bench Press", 5, 100), 0)
+        self.assertEqual(self.draft.append_set("Bench Press", 5, 100), 1)
+        self.draft.update_set(1, reps=3)
+
+        draft = self.draft.get()
+        self.assertEqual(draft["workout_name"], "Push Day")
+        self.assertEqual(draft["date"], timezone.localdate().isoformat())
+        self.assertEqual([workout_set["reps"] for workout_set in draft["sets"]], [5, 3])
+        with self.assertRaises(WorkoutDraftError):
+            self.draft.update_set(2, reps=3)
+
+    def test_patches_do_not_read_previous_sets(self):
+        self.draft.start("Push Day")
+        for _ in range(20):
+            self.draft.append_set("Bench Press", 5, 100)
+
+        with mock.patch.object(
+            self.draft, "cache", wraps=self.draft.cache
+        ) as wrapped_cache:
+            self.draft.append_set("Bench Press", 5, 100)
+            self.draft.update_set(3, weight=110)
+        wrapped_cache.get_many.assert_not_called()
+        self.assertEqual(wrapped_cache.get.call_count, 1)
+
+    def test_draft_with_lost_set_is_not_read_or_committed(self):
+        self.draft.start("Push Day")
+        for _ in range(3):
+            self.draft.append_set("Bench Press", 5, 100)
+        self.draft.cache.delete(self.draft.get_set_key(1))
+
+        with self.assertRaises(WorkoutDraftIncompleteError):
+            self.draft.get()
+        with self.assertRaises(WorkoutDraftIncompleteError):
+            self.draft.commit(self.context, total_time=1800)
+        self.assertFalse(WorkoutLog.objects.exists())
+
+    def test_get_workout_exercises_groups_consecutive_sets(self):
+        workout_sets = [
+            {"exercise": "Squat", "reps": 5, "weight": 200},
+            {"exercise": "Squat", "reps": 3, "weight": 220},
+            {"exercise": "Lunge", "reps": 10, "weight": 50},
+            {"exercise": "Squat", "reps": 8, "weight": 150},
+        ]
+        self.assertEqual(
+            WorkoutLogDraft.get_workout_exercises(workout_sets),
+            [
+                {"Squat": {"reps": [5, 3], "weights": [200, 220]}},
+                {"Lunge": {"reps": [10], "weights": [50]}},
+                {"Squat": {"reps": [8], "weights": [150]}},
+            ],
+        )
+
+    def test_commit_creates_log_and_discards_draft(self):
+        self.draft.start("Push Day", timezone.localdate() - timedelta(days=1))
+        self.draft.append_set("Bench Press", 5, 100)
+        self.draft.append_set("Overhead Press", 5, 60)
+
+        workout_log = self.draft.commit(self.context, total_time=1800)
+
+        self.assertEqual(workout_log.date, timezone.localdate() - timedelta(days=1))
+        self.assertEqual(workout_log.total_time, timedelta(seconds=1800))
+        self.assertEqual(
+            list(
+                workout_log.workout_sets.order_by("pk").values_list(
+                    "exercise__name", "weight"
+                )
+            ),
+            [("Bench Press", 100), ("Overhead Press", 60)],
+        )
+        with self.assertRaises(WorkoutDraftError):
+            self.draft.get()
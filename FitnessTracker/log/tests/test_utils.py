@@ -1,4 +1,5 @@
 from django.test import TestCase
+from django.core.cache import cache
 from django.utils import timezone
 from unittest.mock import MagicMock
 from datetime import date
@@ -12,6 +13,7 @@ from workout.models import Workout
 
 class TestCalendar(TestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create(**CREATE_USER)
         self.year = timezone.now().year
         self.month = timezone.now().month
@@ -63,3 +65,83 @@ class TestCalendar(TestCase):
         self.assertIn("navigate_before", result)
         self.assertIn("navigate_next", result)
         self.assertIn("month p-0_2", result)
+
+    def test_formatmonth_query_count_is_constant(self):
+        for day in range(1, 28):
+            CardioLog.objects.create(
+                user=self.user,
+                datetime=timezone.make_aware(
+                    timezone.datetime(self.year, self.month, day, 10, 30)
+                ),
+                duration=timezone.timedelta(minutes=30),
+                distance=5.0,
+            )
+        calendar = Calendar(user=self.user, year=self.year, month=self.month)
+
+        with self.assertNumQueries(1):
+            result = calendar.formatmonth()
+
+        self.assertEqual(result.count("steps-icon"), 27)
+        self.assertEqual(result.count("exercise-icon"), 1)
+        self.assertEqual(result.count("monitor_weight-icon"), 1)
+
+
+class TestCalendarCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(**CREATE_USER)
+        self.workout = Workout.objects.create(user=self.user, name="Test Workout")
+
+    def render(self, year=2024, month=4):
+        return Calendar(user=self.user, year=year, month=month).formatmonth()
+
+    def create_weight_log(self, log_date):
+        return WeightLog.objects.create(
+            user=self.user, date=log_date, body_weight=150.0, body_fat=15.0
+        )
+
+    def test_rendered_month_is_cached(self):
+        self.render()
+
+        with self.assertNumQueries(0):
+            result = self.render()
+
+        self.assertIn("month-name", result)
+
+    def test_saving_log_invalidates_month(self):
+        self.render()
+        self.render(month=3)
+
+        WorkoutLog.objects.create(
+            user=self.user,
+            workout=self.workout,
+            date=date(2024, 4, 10),
+            total_time=timezone.timedelta(minutes=30),
+        )
+
+        self.assertIn("exercise-icon", self.render())
+        with self.assertNumQueries(0):
+            self.render(month=3)
+
+    def test_moving_log_invalidates_previous_month(self):
+        weight_log = self.create_weight_log(date(2024, 3, 10))
+        self.assertIn("monitor_weight-icon", self.render(month=3))
+
+        weight_log.date = date(2024, 4, 10)
+        weight_log.save()
+
+        self.assertNotIn("monitor_weight-icon", self.render(month=3))
+        self.assertIn("monitor_weight-icon", self.render(month=4))
+
+    def test_deleting_log_invalidates_month(self):
+        cardio_log = CardioLog.objects.create(
+            user=self.user,
+            datetime=timezone.make_aware(timezone.datetime(2024, 4, 10, 10, 30)),
+            duration=timezone.timedelta(minutes=30),
+            distance=5.0,
+        )
+        self.assertIn("steps-icon", self.render())
+
+        cardio_log.delete()
+
+        self.assertNotIn("steps-icon", self.render())
@@ -1,18 +1,22 @@
 from django.test import TestCase, RequestFactory
 from django.urls import reverse
 from django.utils import timezone
-from django.core.cache import cache
+from django.conf import settings
+from django.core.cache import cache, caches
 from django.test import Client
 from rest_framework.test import APIClient, APITestCase
 from datetime import timedelta, date
 from bs4 import BeautifulSoup
 from log.views import LogTemplateView
+from log.services import WorkoutLogDraft
 from users.models import User, UserSettings
 from workout.models import Workout, Exercise
 from rest_framework import status
-from log.models import WeightLog, CardioLog, WorkoutLog, FoodLog
+from log.models import WeightLog, CardioLog, WorkoutLog, WorkoutSet, FoodLog
 from common.test_utils import ViewSharedTests
+from common.test_globals import CREATE_USER
 from unittest.mock import patch, MagicMock
+from django.core.files.uploadedfile import SimpleUploadedFile
 
 
 class TestLogTemplateView(ViewSharedTests, TestCase):
@@ -34,6 +38,7 @@ class TestLogTemplateView(ViewSharedTests, TestCase):
 
     def setUp(self):
         super().setUp()
+        cache.clear()
         self.factory = RequestFactory()
         self.workout = Workout.objects.create(user=self.user, name="Test Workout")
         WorkoutLog.objects.create(
@@ -158,6 +163,37 @@ class TestDailyLogView(TestCase):
         self.assertIn("weight_log", response.context)
         self.assertEqual(response.context["weight_log"], self.weight_log)
 
+    def add_workout_logs(self, log_count, set_count):
+        exercises = [
+            Exercise.objects.create(user=self.user, name=name)
+            for name in ["Squat", "Bench Press", "Deadlift"]
+        ]
+        for _ in range(log_count):
+            workout_log = WorkoutLog.objects.create(
+                user=self.user, date=self.date, workout=self.workout
+            )
+            WorkoutSet.objects.bulk_create(
+                WorkoutSet(
+                    workout_log=workout_log,
+                    exercise=exercises[i % len(exercises)],
+                    weight=100,
+                    reps=5,
+                )
+                for i in range(set_count)
+            )
+
+    def test_daily_log_view_query_count(self):
+        url = reverse("daily_log", kwargs={"year": "2024", "month": "4", "day": "11"})
+        self.add_workout_logs(log_count=4, set_count=15)
+
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+
+        workout_logs = response.context["workout_logs"]
+        self.assertEqual(len(workout_logs), 5)
+        self.assertEqual(workout_logs[0]["workout_name"], "Test Workout")
+        self.assertEqual(workout_logs[1]["exercises"]["Squat"]["reps"], [5] * 5)
+
     def test_log_view_user_not_authenticated(self):
         self.client.logout()
         url = reverse("daily_log")
@@ -304,9 +340,63 @@ class TestWorkoutLogViewSet(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(
-            len(response.data), 1
+            len(response.data["results"]), 1
         )  # Ensure only the user's logs are listed
 
+    def create_workout_logs(self, log_count, set_count):
+        exercise = Exercise.objects.create(user=self.user, name="Squat")
+        workout_logs = WorkoutLog.objects.bulk_create(
+            WorkoutLog(
+                user=self.user,
+                workout=self.workout,
+                date=date(2024, 1, 1) + timedelta(days=i),
+            )
+            for i in range(log_count)
+        )
+        WorkoutSet.objects.bulk_create(
+            WorkoutSet(workout_log=workout_log, exercise=exercise, weight=100, reps=5)
+            for workout_log in workout_logs
+            for _ in range(set_count)
+        )
+
+    def test_list_workout_logs_query_count(self):
+        self.create_workout_logs(log_count=30, set_count=6)
+        url = reverse("workoutlog-list")
+
+        User.get_default_user()
+
+        # Session, user, page of logs and their sets
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data["results"]), 31)
+        self.assertEqual(
+            response.data["results"][1]["exercises"]["Squat"]["reps"], [5] * 6
+        )
+
+    def test_list_workout_logs_cursor_pagination(self):
+        self.create_workout_logs(log_count=4, set_count=1)
+        url = reverse("workoutlog-list")
+
+        response = self.client.get(url, {"page_size": 3})
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["next"])
+
+    def test_retrieve_workout_log_query_count(self):
+        self.create_workout_logs(log_count=1, set_count=10)
+        workout_log = WorkoutLog.objects.get(date=date(2024, 1, 1))
+        url = reverse("workoutlog-detail", kwargs={"pk": workout_log.pk})
+        User.get_default_user()
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data["exercises"]["Squat"]["reps"]), 10)
+
     def test_create_workout_log(self):
         url = reverse("workoutlog-list")
         data = {
@@ -491,3 +581,198 @@ class FoodLogViewSetTest(APITestCase):
         response = self.client.post(self.url_list, self.food_data, format="json")
         logs = FoodLog.objects.filter(user=self.user, date=date.today())
         self.assertEqual(len(logs), 1)
+
+
+class TestActivityHeatmapAPIView(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(**CREATE_USER)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("activity_heatmap")
+        WeightLog.objects.create(
+            user=self.user, date=date(2024, 4, 1), body_weight=150, body_fat=20
+        )
+
+    def test_authentication_required(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_get_heatmap(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {"end": "2024-04-01"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["end"], date(2024, 4, 1))
+        self.assertEqual(len(response.data["days"]), 365)
+        self.assertEqual(response.data["days"][-1][0], 2)
+        self.assertEqual(response.data["days"][-1][3], 150)
+
+    def test_end_defaults_to_today(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["end"], timezone.localdate())
+
+    def test_invalid_end(self):
+        response = self.client.get(self.url, {"end": "not-a-date"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("detail", response.data)
+
+    def test_end_out_of_range(self):
+        future = timezone.localdate() + timedelta(days=2)
+        for end in ["0001-03-01", str(future)]:
+            response = self.client.get(self.url, {"end": end})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestLogExportView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(**CREATE_USER)
+        self.client.force_login(self.user)
+        WeightLog.objects.create(
+            user=self.user, date=date(2024, 4, 1), body_weight=150, body_fat=20
+        )
+
+    def get_content(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_csv(self):
+        response = self.client.get(reverse("log_export", args=["csv"]))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("logs.csv", response["Content-Disposition"])
+        self.assertIn("weight,2024-04-01", self.get_content(response))
+
+    def test_export_ndjson(self):
+        response = self.client.get(reverse("log_export", args=["ndjson"]))
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn('"body_weight": 150.0', self.get_content(response))
+
+    def test_unsupported_format(self):
+        response = self.client.get(reverse("log_export", args=["xml"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_login_required(self):
+        self.client.logout()
+        response = self.client.get(reverse("log_export", args=["csv"]))
+        self.assertEqual(response.status_code, 302)
+
+
+class TestLogImportAPIView(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(**CREATE_USER)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("log_import")
+        self.day = timezone.localdate() - timedelta(days=1)
+
+    def test_import_json_rows(self):
+        rows = [
+            {
+                "type": "weight",
+                "date": str(self.day),
+                "body_weight": 180,
+                "body_fat": 15,
+            }
+        ]
+        response = self.client.post(self.url, rows, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"]["weight"], 1)
+        self.assertTrue(WeightLog.objects.filter(user=self.user).exists())
+
+    def test_import_csv_file(self):
+        upload = SimpleUploadedFile(
+            "logs.csv",
+            f"type,date,duration,distance\ncardio,{self.day},1800,3\n".encode(),
+        )
+        response = self.client.post(self.url, {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"]["cardio"], 1)
+
+    def test_invalid_payload(self):
+        response = self.client.post(self.url, {"rows": "nope"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestWorkoutDraftAPIViews(APITestCase):
+    def setUp(self):
+        caches[settings.WORKOUT_DRAFT_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(**CREATE_USER)
+        self.client.force_authenticate(user=self.user)
+
+    def test_workout_draft_session(self):
+        response = self.client.post(
+            reverse("workout_draft"), {"workout_name": "Push Day"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        for reps in [5, 5]:
+            response = self.client.post(
+                reverse("workout_draft_sets"),
+                {"exercise": "Bench Press", "reps": reps, "weight": 100},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.patch(
+            reverse("workout_draft_set", args=[1]), {"reps": 4}, format="json"
+        )
+        self.assertEqual(response.data["reps"], 4)
+
+        response = self.client.post(
+            reverse("workout_draft_commit"), {"total_time": 1200}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["exercises"]["Bench Press"]["reps"], [5, 4])
+        self.assertEqual(
+            self.client.get(reverse("workout_draft")).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_invalid_total_time(self):
+        self.client.post(
+            reverse("workout_draft"), {"workout_name": "Push Day"}, format="json"
+        )
+        response = self.client.post(
+            reverse("workout_draft_commit"), {"total_time": "12.5"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("total_time", response.data)
+
+    def test_draft_with_lost_set(self):
+        self.client.post(
+            reverse("workout_draft"), {"workout_name": "Push Day"}, format="json"
+        )
+        for _ in range(2):
+            self.client.post(
+                reverse("workout_draft_sets"),
+                {"exercise": "Bench Press", "reps": 5, "weight": 100},
+                format="json",
+            )
+        draft = WorkoutLogDraft(self.user)
+        draft.cache.delete(draft.get_set_key(0))
+
+        response = self.client.get(reverse("workout_draft"))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.post(reverse("workout_draft_commit"), format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(WorkoutLog.objects.exists())
+
+    def test_invalid_set(self):
+        self.client.post(
+            reverse("workout_draft"), {"workout_name": "Push Day"}, format="json"
+        )
+        response = self.client.post(
+            reverse("workout_draft_sets"),
+            {"exercise": "Bench Press", "reps": 500, "weight": 100},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_set_without_draft(self):
+        response = self.client.post(
+            reverse("workout_draft_sets"),
+            {"exercise": "Bench Press", "reps": 5, "weight": 100},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -20,6 +20,33 @@ urlpatterns = [
         views.DailyLogView.as_view(),
         name="daily_log",
     ),
+    path(
+        "activity/",
+        views.ActivityHeatmapAPIView.as_view(),
+        name="activity_heatmap",
+    ),
+    path(
+        "export/<str:export_format>/",
+        views.LogExportView.as_view(),
+        name="log_export",
+    ),
+    path("import/", views.LogImportAPIView.as_view(), name="log_import"),
+    path("workout_draft/", views.WorkoutDraftAPIView.as_view(), name="workout_draft"),
+    path(
+        "workout_draft/sets/",
+        views.WorkoutDraftSetAPIView.as_view(),
+        name="workout_draft_sets",
+    ),
+    path(
+        "workout_draft/sets/<int:index>/",
+        views.WorkoutDraftSetAPIView.as_view(),
+        name="workout_draft_set",
+    ),
+    path(
+        "workout_draft/commit/",
+        views.WorkoutDraftCommitAPIView.as_view(),
+        name="workout_draft_commit",
+    ),
     path(
         "weight_log_template/",
         views.WeightLogTemplateView.as_view(),
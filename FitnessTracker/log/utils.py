@@ -1,36 +1,72 @@
 from calendar import HTMLCalendar, month_name
+from collections import defaultdict
+from django.core.cache import cache
+from django.db.models import IntegerField, Value
+from django.db.models.functions import ExtractDay
 
-from log.models import WorkoutLog, CardioLog, WeightLog
+from log.models import (
+    WorkoutLog,
+    CardioLog,
+    WeightLog,
+    WORKOUT_ACTIVITY,
+    WEIGHT_ACTIVITY,
+    CARDIO_ACTIVITY,
+)
+
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 class Calendar(HTMLCalendar):
     def __init__(self, firstweekday=6, user=None, year=None, month=None):
         super().__init__(firstweekday)
+        self.user = user
         self.workout_logs = WorkoutLog.get_logs(user, year, month)
         self.weight_logs = WeightLog.get_logs(user, year, month)
         self.cardio_logs = CardioLog.get_logs(user, year, month)
         self.year = year
         self.month = month
+        self.activity = None
 
-    def formatday(self, day, weekday):
-        workout_log = self.workout_logs.filter(date__day=day).first()
-        weight_log = self.weight_logs.filter(date__day=day).first()
-        cardio_log = self.cardio_logs.filter(datetime__day=day).first()
+    def get_activity(self):
+        """
+        Returns a bitmask of the logged activity for each day of the month, loaded
+        with a single query the first time a day is rendered.
+        """
+        if self.activity is None:
+            self.activity = defaultdict(int)
+            activity_days = self.get_activity_days(
+                self.workout_logs, "date", WORKOUT_ACTIVITY
+            ).union(
+                self.get_activity_days(self.weight_logs, "date", WEIGHT_ACTIVITY),
+                self.get_activity_days(self.cardio_logs, "datetime", CARDIO_ACTIVITY),
+            )
+            for day, activity in activity_days:
+                self.activity[day] |= activity
+        return self.activity
+
+    @staticmethod
+    def get_activity_days(logs, date_field, activity):
+        return logs.order_by().values_list(
+            ExtractDay(date_field),
+            Value(activity, output_field=IntegerField()),
+        )
 
+    def formatday(self, day, weekday):
         if day == 0:
             day_format = (
                 '<td class="noday">&nbsp;</td>'  # If day is 0, display an empty cell
             )
         else:
+            activity = self.get_activity()[day]
             day_format = f'<td class="{self.cssclasses[weekday]} day" data-day="{day}"><div>{day}</div>'
-            if workout_log is not None:
+            if activity & WORKOUT_ACTIVITY:
                 day_format += '<div><span class="material-symbols-outlined exercise-icon text-xl">exercise</span></div>'
-            if weight_log is not None:
+            if activity & WEIGHT_ACTIVITY:
                 day_format += (
                     f'<div><span class="material-symbols-outlined monitor_weight-icon text-xl">'
                     f"monitor_weight</span></div>"
                 )
-            if cardio_log is not None:
+            if activity & CARDIO_ACTIVITY:
                 day_format += (
                     f'<div><span class="material-symbols-outlined steps-icon text-xl">'
                     f"steps</span></div>"
@@ -39,7 +75,25 @@ class Calendar(HTMLCalendar):
             day_format += "</td>"
         return day_format
 
+    @staticmethod
+    def get_cache_key(user_id, year, month):
+        return f"calendar_{user_id}_{year}_{month}"
+
+    @classmethod
+    def invalidate_month(cls, user_id, year, month):
+        """Removes a user's rendered month, called by signals when its logs change"""
+        cache.delete(cls.get_cache_key(user_id, year, month))
+
     def formatmonth(self, year=None, month=None, withyear=True):
+        # Rendered months are cached until one of their logs is saved or deleted
+        cache_key = self.get_cache_key(self.user.id, self.year, self.month)
+        cal = cache.get(cache_key)
+        if cal is None:
+            cal = self.render_month(withyear)
+            cache.set(cache_key, cal, timeout=CALENDAR_CACHE_TIMEOUT)
+        return cal
+
+    def render_month(self, withyear=True):
         # Get the calendar table with the month's days
         year = self.year
         month = self.month
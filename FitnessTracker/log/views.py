@@ -1,10 +1,20 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView
 from django.shortcuts import render
+from django.http import Http404, StreamingHttpResponse
+from django.views import View
+from django.core.exceptions import ValidationError
+from django.utils import timezone
 from calendar import month_name
-from datetime import datetime
-from common.base import BaseOwnerViewSet, BaseTemplateView
+from datetime import datetime, date
+from rest_framework import status
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from common.base import BaseOwnerViewSet, BaseTemplateView, DateCursorPagination
 from .utils import Calendar
+from .validators import validate_not_future_date, validate_not_more_than_5_years_ago
 from workout.models import Workout, Exercise
 from workout.base import ExerciseTemplateView
 from .serializers import (
@@ -12,8 +22,21 @@ from .serializers import (
     WorkoutLogSerializer,
     WeightLogSerializer,
     FoodLogSerializer,
+    WorkoutDraftSerializer,
+    WorkoutDraftSetSerializer,
+    WorkoutDraftCommitSerializer,
+)
+from .models import WorkoutLog, CardioLog, WeightLog, FoodLog, DailyActivity
+from .services import (
+    EXPORT_FORMATS,
+    iter_export_rows,
+    parse_import_file,
+    LogImporter,
+    LogImportError,
+    WorkoutLogDraft,
+    WorkoutDraftError,
+    WorkoutDraftIncompleteError,
 )
-from .models import WorkoutLog, CardioLog, WeightLog, FoodLog
 
 
 # Create your views here.
@@ -59,11 +82,10 @@ class DailyLogView(BaseTemplateView, TemplateView):
 
         date = f"{year}-{month}-{day}"
 
-        workout_logs = WorkoutLog.objects.filter(user=self.request.user, date=date)
-        context["workout_logs"] = [
-            WorkoutLogSerializer(instance=workout_log).data
-            for workout_log in workout_logs
-        ]
+        workout_logs = WorkoutLog.prefetch_sets(
+            WorkoutLog.objects.filter(user=self.request.user, date=date).order_by("pk")
+        )
+        context["workout_logs"] = WorkoutLogSerializer(workout_logs, many=True).data
 
         weight_log = WeightLog.objects.filter(user=self.request.user, date=date).first()
         context["weight_log"] = weight_log
@@ -76,6 +98,167 @@ class DailyLogView(BaseTemplateView, TemplateView):
         return context
 
 
+class ActivityHeatmapAPIView(APIView):
+    """
+    Returns a row of activity flags and volumes for each of the 365 days ending on
+    ?end= (YYYY-MM-DD, defaults to today, at most 5 years ago), read from the
+    DailyActivity index.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_end_date(self):
+        end = self.request.query_params.get("end")
+        if not end:
+            return timezone.localdate()
+        end = date.fromisoformat(end)
+        validate_not_future_date(end)
+        validate_not_more_than_5_years_ago(end)
+        return end
+
+    def get(self, request, *args, **kwargs):
+        try:
+            end = self.get_end_date()
+        except ValueError:
+            return Response(
+                {"detail": "Invalid end date, expected YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except ValidationError as e:
+            return Response(
+                {"detail": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(DailyActivity.get_heatmap(request.user, end))
+
+
+class LogExportView(LoginRequiredMixin, View):
+    """Streams the user's full log history as csv or ndjson without loading it into memory"""
+
+    def get(self, request, export_format, *args, **kwargs):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404(f"Unsupported export format: {export_format}")
+
+        stream, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            stream(iter_export_rows(request.user)), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="fitness-tracker-logs.{export_format}"'
+        )
+        return response
+
+
+class LogImportAPIView(APIView):
+    """
+    Imports logs in the export format, either as an uploaded csv/json "file" or as a
+    json list of rows. Returns the number of rows created per type and the errors of
+    rows that were skipped.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, JSONParser]
+
+    def get_rows(self, request):
+        if "file" in request.FILES:
+            return parse_import_file(request.FILES["file"])
+        if isinstance(request.data, list) and all(
+            isinstance(row, dict) for row in request.data
+        ):
+            return request.data
+        raise LogImportError("Upload a file or post a list of rows.")
+
+    def post(self, request, *args, **kwargs):
+        try:
+            rows = self.get_rows(request)
+        except LogImportError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = LogImporter(request.user).run(rows)
+        return Response(report, status=status.HTTP_201_CREATED)
+
+
+class WorkoutDraftAPIView(APIView):
+    """
+    Starts (POST), returns (GET) or discards (DELETE) the user's in-progress workout,
+    kept in the cache until it is committed.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            return Response(WorkoutLogDraft(request.user).get())
+        except WorkoutDraftIncompleteError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+        except WorkoutDraftError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    def post(self, request, *args, **kwargs):
+        serializer = WorkoutDraftSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        info = WorkoutLogDraft(request.user).start(**serializer.validated_data)
+        return Response(info, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, *args, **kwargs):
+        WorkoutLogDraft(request.user).discard()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class WorkoutDraftSetAPIView(APIView):
+    """Appends a set to the workout in progress (POST) or edits one by index (PATCH)"""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = WorkoutDraftSetSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            index = WorkoutLogDraft(request.user).append_set(
+                **serializer.validated_data
+            )
+        except WorkoutDraftError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            {"index": index, **serializer.validated_data},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def patch(self, request, index, *args, **kwargs):
+        serializer = WorkoutDraftSetSerializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            workout_set = WorkoutLogDraft(request.user).update_set(
+                index, **serializer.validated_data
+            )
+        except WorkoutDraftError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"index": index, **workout_set})
+
+
+class WorkoutDraftCommitAPIView(APIView):
+    """
+    Saves the workout in progress as a WorkoutLog, total_time is in whole seconds.
+    A draft that lost any of its sets is rejected rather than saved partially.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = WorkoutDraftCommitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            workout_log = WorkoutLogDraft(request.user).commit(
+                {"request": request}, serializer.validated_data.get("total_time")
+            )
+        except WorkoutDraftIncompleteError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+        except WorkoutDraftError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return Response(
+            WorkoutLogSerializer(workout_log).data, status=status.HTTP_201_CREATED
+        )
+
+
 class WeightLogTemplateView(BaseTemplateView, TemplateView):
     template_name = "log/save_weight_log.html"
 
@@ -125,6 +308,16 @@ class UpdateWorkoutLogTemplateView(ExerciseTemplateView):
 class WorkoutLogViewSet(BaseOwnerViewSet):
     queryset = WorkoutLog.objects.all()
     serializer_class = WorkoutLogSerializer
+    pagination_class = DateCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Reads serialize every set, writes only need the workout for the response
+        if self.action in ("list", "retrieve"):
+            return WorkoutLog.prefetch_sets(queryset)
+        if self.action in ("update", "partial_update"):
+            return queryset.select_related("workout")
+        return queryset
 
 
 class CardioLogViewSet(BaseOwnerViewSet):
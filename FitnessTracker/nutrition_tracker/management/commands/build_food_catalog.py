@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from log.models import FoodItem
+from nutrition_tracker.models import Food
+
+
+class Command(BaseCommand):
+    help = "Adds every logged food item to the local food catalog"
+
+    def handle(self, *args, **options):
+        Food.objects.update(times_logged=0)
+        food_items = (
+            FoodItem.objects.order_by("pk")
+            .only("name", "calories", "protein", "carbs", "fat")
+            .iterator()
+        )
+        Food.record_logged(food_items)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Food catalog has {Food.objects.count()} foods")
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 4.2 on 2026-10-18 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Food",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "item_type",
+                    models.CharField(
+                        choices=[("common", "Common"), ("branded", "Branded")],
+                        default="common",
+                        max_length=10,
+                    ),
+                ),
+                ("item_id", models.CharField(max_length=200)),
+                ("name", models.CharField(max_length=200)),
+                ("search_name", models.CharField(db_index=True, max_length=200)),
+                ("brand_name", models.CharField(blank=True, max_length=200)),
+                ("photo_thumb", models.URLField(blank=True, max_length=500)),
+                ("photo_highres", models.URLField(blank=True, max_length=500)),
+                ("serving_qty", models.FloatField(blank=True, null=True)),
+                ("serving_unit", models.CharField(blank=True, max_length=100)),
+                ("calories", models.FloatField(blank=True, null=True)),
+                ("protein", models.FloatField(blank=True, null=True)),
+                ("carbs", models.FloatField(blank=True, null=True)),
+                ("fat", models.FloatField(blank=True, null=True)),
+                ("times_logged", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "unique_together": {("item_type", "item_id")},
+            },
+        ),
+    ]
@@ -1,5 +1,168 @@
 from django.db import models
-from users.models import User
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce
 
 
-# Create your models here.
+SEARCH_RESULT_LIMIT = 20
+
+
+class Food(models.Model):
+    """
+    Local catalog of foods answering food searches before Nutritionix is queried.
+    Rows are added for every logged FoodItem with the nutrients it was logged with
+    and replaced by the details of Nutritionix items once they are fetched,
+    search_name is indexed so a prefix search is an index range scan.
+    """
+
+    COMMON = "common"
+    BRANDED = "branded"
+    ITEM_TYPES = [(COMMON, "Common"), (BRANDED, "Branded")]
+    LOGGED_SERVING_UNIT = "serving"
+
+    item_type = models.CharField(max_length=10, choices=ITEM_TYPES, default=COMMON)
+    # food_name for common foods, nix_item_id for branded ones
+    item_id = models.CharField(max_length=200)
+    name = models.CharField(max_length=200)
+    search_name = models.CharField(max_length=200, db_index=True)
+    brand_name = models.CharField(max_length=200, blank=True)
+    photo_thumb = models.URLField(max_length=500, blank=True)
+    photo_highres = models.URLField(max_length=500, blank=True)
+    # Nutrients per serving, null until the food is logged or its details fetched
+    serving_qty = models.FloatField(null=True, blank=True)
+    serving_unit = models.CharField(max_length=100, blank=True)
+    calories = models.FloatField(null=True, blank=True)
+    protein = models.FloatField(null=True, blank=True)
+    carbs = models.FloatField(null=True, blank=True)
+    fat = models.FloatField(null=True, blank=True)
+    times_logged = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("item_type", "item_id")
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def normalize(name):
+        return " ".join(name.lower().split())
+
+    @property
+    def has_details(self):
+        return self.calories is not None
+
+    @classmethod
+    def search(cls, query, limit=SEARCH_RESULT_LIMIT):
+        """Returns the foods whose name starts with query, most logged first"""
+        return cls.objects.filter(
+            search_name__startswith=cls.normalize(query)
+        ).order_by("-times_logged", "search_name")[:limit]
+
+    @classmethod
+    def record_logged(cls, food_items):
+        """
+        Adds logged food items to the catalog and counts how often they are logged.
+        Foods without details get a serving of the first item logged under their name.
+        """
+        counts = {}
+        foods = {}
+        for food_item in food_items:
+            search_name = cls.normalize(food_item.name)
+            if not search_name:
+                continue
+            counts[search_name] = counts.get(search_name, 0) + 1
+            if search_name not in foods:
+                foods[search_name] = cls(
+                    item_type=cls.COMMON,
+                    item_id=search_name,
+                    name=search_name,
+                    search_name=search_name,
+                    serving_qty=1,
+                    serving_unit=cls.LOGGED_SERVING_UNIT,
+                    calories=food_item.calories,
+                    protein=food_item.protein,
+                    carbs=food_item.carbs,
+                    fat=food_item.fat,
+                )
+
+        cls.objects.bulk_create(foods.values(), ignore_conflicts=True)
+        for search_name, count in counts.items():
+            food = foods[search_name]
+            # Every SET reads the row as it was, so the details are only filled
+            # in where calories were still missing
+            cls.objects.filter(item_type=cls.COMMON, item_id=search_name).update(
+                times_logged=F("times_logged") + count,
+                serving_qty=Case(
+                    When(calories__isnull=True, then=Value(1.0)),
+                    default=F("serving_qty"),
+                ),
+                serving_unit=Case(
+                    When(calories__isnull=True, then=Value(cls.LOGGED_SERVING_UNIT)),
+                    default=F("serving_unit"),
+                ),
+                calories=Coalesce(F("calories"), Value(float(food.calories))),
+                protein=Coalesce(F("protein"), Value(float(food.protein))),
+                carbs=Coalesce(F("carbs"), Value(float(food.carbs))),
+                fat=Coalesce(F("fat"), Value(float(food.fat))),
+            )
+
+    @classmethod
+    def update_from_nutritionix(cls, item_type, item_id, food):
+        """Stores the details of a food returned by the Nutritionix item endpoints"""
+        if item_type != cls.BRANDED:
+            item_type, item_id = cls.COMMON, cls.normalize(item_id)
+        photo = food.get("photo") or {}
+        food, _ = cls.objects.update_or_create(
+            item_type=item_type,
+            item_id=item_id,
+            defaults={
+                "name": food["food_name"],
+                "search_name": cls.normalize(food["food_name"]),
+                "brand_name": food.get("brand_name") or "",
+                "photo_thumb": photo.get("thumb") or "",
+                "photo_highres": photo.get("highres") or "",
+                "serving_qty": food.get("serving_qty"),
+                "serving_unit": food.get("serving_unit") or "",
+                "calories": food.get("nf_calories") or 0,
+                "protein": food.get("nf_protein") or 0,
+                "carbs": food.get("nf_total_carbohydrate") or 0,
+                "fat": food.get("nf_total_fat") or 0,
+            },
+        )
+        return food
+
+    def to_search_result(self):
+        """Returns the food in the format of a Nutritionix instant search result"""
+        result = {"food_name": self.name}
+        # Foods without a photo leave it out rather than sending an empty image
+        if self.photo_thumb:
+            result["photo"] = {"thumb": self.photo_thumb}
+        if self.item_type == self.BRANDED:
+            result.update(
+                {
+                    "brand_name": self.brand_name,
+                    "nf_calories": self.calories,
+                    "nix_item_id": self.item_id,
+                }
+            )
+        return result
+
+    def to_item_details(self):
+        """Returns the food in the format of a Nutritionix item details response"""
+        return {
+            "foods": [
+                {
+                    "food_name": self.name,
+                    "brand_name": self.brand_name or None,
+                    "serving_qty": self.serving_qty,
+                    "serving_unit": self.serving_unit,
+                    "nf_calories": self.calories,
+                    "nf_protein": self.protein,
+                    "nf_total_carbohydrate": self.carbs,
+                    "nf_total_fat": self.fat,
+                    "photo": {
+                        "thumb": self.photo_thumb or None,
+                        "highres": self.photo_highres or None,
+                    },
+                }
+            ]
+        }
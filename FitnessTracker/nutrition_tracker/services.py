@@ -1,7 +1,16 @@
+import hashlib
 import json
+import threading
+from concurrent.futures import Future
 from log.models import FoodLog
+from common.search import PrefixSearch
+from .models import Food, SEARCH_RESULT_LIMIT
 from datetime import timedelta
 import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Sum
 from django.utils import timezone
 from dotenv import load_dotenv
 import os
@@ -9,6 +18,41 @@ import os
 
 load_dotenv()
 
+SUMMARY_PERIOD_DAYS = {"week": 7, "month": 30, "year": 365}
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key, the first caller runs the call
+    while the others wait for it and share its result instead of repeating it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, function, *args, **kwargs):
+        with self.lock:
+            future = self.calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self.calls[key] = Future()
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
 
 class Nutritionix:
     APP_ID = os.environ.get("APP_ID")
@@ -19,56 +63,169 @@ class Nutritionix:
         "x-app-key": APP_KEY,
     }
 
+    _session = None
+    in_flight = SingleFlight()
+
+    @classmethod
+    def get_session(cls):
+        """
+        Returns the session shared by all requests, it keeps a bounded pool of
+        keep-alive connections so requests skip the TCP and TLS handshakes.
+        """
+        if cls._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1, pool_maxsize=settings.NUTRITIONIX_POOL_SIZE
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(cls.HEADERS)
+            cls._session = session
+        return cls._session
+
+    @classmethod
+    def get_cache_key(cls, *args):
+        return "nutritionix_" + hashlib.sha256(repr(args).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def fetch(cls, method, path, **kwargs):
+        """
+        Returns the json response of the API or None if it fails or times out.
+        Successful responses are cached, so repeated queries skip the API, and
+        identical requests made while one is in flight wait for its response.
+        """
+        cache_key = cls.get_cache_key(method, path, kwargs)
+        data = caches[settings.NUTRITIONIX_CACHE_ALIAS].get(cache_key)
+        if data is not None:
+            return data
+        return cls.in_flight.do(
+            cache_key, cls.request, method, path, cache_key, **kwargs
+        )
+
+    @classmethod
+    def request(cls, method, path, cache_key, **kwargs):
+        # A leader that finished after the caller's cache check may have already
+        # cached the response
+        data = caches[settings.NUTRITIONIX_CACHE_ALIAS].get(cache_key)
+        if data is not None:
+            return data
+
+        try:
+            response = cls.get_session().request(
+                method,
+                settings.NUTRITIONIX_URL + path,
+                timeout=settings.NUTRITIONIX_TIMEOUT,
+                **kwargs,
+            )
+            if response.status_code != 200:
+                return None
+            data = response.json()
+        except (requests.RequestException, ValueError):
+            return None
+
+        caches[settings.NUTRITIONIX_CACHE_ALIAS].set(cache_key, data)
+        return data
+
+    @classmethod
+    def search(cls, query):
+        return cls.fetch("GET", "search/instant/", params={"query": query})
+
+    @classmethod
+    def get_item(cls, item_type, item_id):
+        if item_type == "branded":
+            return cls.fetch("GET", "search/item/", params={"nix_item_id": item_id})
+        return cls.fetch(
+            "POST", "natural/nutrients/", data=json.dumps({"query": item_id})
+        )
+
+
+class FoodCatalog:
+    """Answers food lookups from the local Food catalog, falling back to Nutritionix"""
+
     @staticmethod
     def search(query):
-        url = "https://trackapi.nutritionix.com/v2/search/instant/"
-        params = {"query": query}
-        response = requests.get(url, headers=Nutritionix.HEADERS, params=params)
-        return response.json() if response.status_code == 200 else None
+        return FoodCatalog.find(query)[0]
+
+    @staticmethod
+    def find(query):
+        """
+        Returns the search results and whether they hold every local food matching
+        query, which is only known for local results that were not cut off by the
+        limit. Nutritionix is only searched when no local food matches, so the
+        prefix search runs find again for longer queries its filtering empties.
+        """
+        foods = list(Food.search(query))
+        if not foods:
+            return Nutritionix.search(query), False
+
+        results = {"common": [], "branded": []}
+        for food in foods:
+            results[food.item_type].append(food.to_search_result())
+        return results, len(foods) < SEARCH_RESULT_LIMIT
 
     @staticmethod
     def get_item(item_type, item_id):
-        if item_type == "branded":
-            url = "https://trackapi.nutritionix.com/v2/search/item/"
-            params = {"nix_item_id": item_id}
+        if item_type == Food.BRANDED:
+            food = Food.objects.filter(item_type=item_type, item_id=item_id).first()
         else:
-            url = "https://trackapi.nutritionix.com/v2/natural/nutrients/"
-            params = {"query": item_id}
-
-        response = (
-            requests.get(url, headers=Nutritionix.HEADERS, params=params)
-            if item_type == "branded"
-            else requests.post(
-                url, headers=Nutritionix.HEADERS, data=json.dumps(params)
-            )
-        )
-        return response.json() if response.status_code == 200 else None
+            food = Food.objects.filter(
+                item_type=Food.COMMON, item_id=Food.normalize(item_id)
+            ).first()
+        if food is not None and food.has_details:
+            return food.to_item_details()
+
+        data = Nutritionix.get_item(item_type, item_id)
+        if data and data.get("foods"):
+            Food.update_from_nutritionix(item_type, item_id, data["foods"][0])
+        return data
+
+
+food_search = PrefixSearch("food", FoodCatalog.find, name_field="food_name")
 
 
 class FoodLogService:
 
     @staticmethod
-    def get_user_food_summary(user):
+    def get_period_start(end, period):
+        return end - timedelta(days=SUMMARY_PERIOD_DAYS[period] - 1)
+
+    @staticmethod
+    def get_user_food_summary(user, period="week"):
+        """
+        Returns the daily calories and the average daily nutrients of the user's food
+        logs over the period ending today. Every day is summed in one grouped query.
+        """
         bar_graph_data = {"dates": [], "Calories": []}
-        logs = FoodLog.objects.filter(
-            user=user,
-            date__range=(timezone.now() - timedelta(days=6), timezone.now()),
+        end = timezone.localdate()
+        days = (
+            FoodLog.objects.filter(
+                user=user,
+                date__range=(FoodLogService.get_period_start(end, period), end),
+            )
+            .values("date")
+            .annotate(
+                calories=Sum("food_items__calories"),
+                protein=Sum("food_items__protein"),
+                carbs=Sum("food_items__carbs"),
+                fat=Sum("food_items__fat"),
+            )
+            .order_by("date")
         )
-        if not logs:
+        if not days:
             return {"bar_graph_data": bar_graph_data, "pie_chart_data": []}
 
         total_carbs = total_protein = total_fat = total_calories = 0
 
-        for log in logs:
-            daily_calories = sum(food.calories for food in log.food_items.all())
-            total_calories += daily_calories
-            total_protein += sum(food.protein for food in log.food_items.all())
-            total_fat += sum(food.fat for food in log.food_items.all())
-            total_carbs += sum(food.carbs for food in log.food_items.all())
-            bar_graph_data["dates"].append(log.date)
-            bar_graph_data["Calories"].append(daily_calories)
+        # Days logged without food items have no sums
+        for day in days:
+            total_calories += day["calories"] or 0
+            total_protein += day["protein"] or 0
+            total_fat += day["fat"] or 0
+            total_carbs += day["carbs"] or 0
+            bar_graph_data["dates"].append(day["date"])
+            bar_graph_data["Calories"].append(day["calories"] or 0)
 
-        num_logs = len(logs)
+        num_logs = len(days)
         user_summary = {
             "avg_protein": round(total_protein / num_logs, 1),
             "avg_carbs": round(total_carbs / num_logs, 1),
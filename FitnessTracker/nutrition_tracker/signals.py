@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from log.models import FoodItem
+from .models import Food
+
+
+@receiver(post_save, sender=FoodItem)
+def add_logged_food_to_catalog(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Food.record_logged([instance])
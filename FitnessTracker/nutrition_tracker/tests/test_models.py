@@ -0,0 +1,106 @@
+from django.test import TestCase
+from django.utils import timezone
+from log.models import FoodItem, FoodLog
+from nutrition_tracker.models import Food
+from users.models import User
+from common.test_globals import CREATE_USER
+from common.test_utils import get_food_items
+
+NUTRITIONIX_FOOD = {
+    "food_name": "Greek Yogurt",
+    "brand_name": "Fage",
+    "serving_qty": 1,
+    "serving_unit": "container",
+    "nf_calories": 150,
+    "nf_protein": 15,
+    "nf_total_carbohydrate": 8,
+    "nf_total_fat": 5,
+    "photo": {"thumb": "https://example.com/thumb.jpg", "highres": None},
+}
+
+
+class TestFood(TestCase):
+    def test_record_logged_counts_normalized_names(self):
+        Food.record_logged(get_food_items("Apple", " apple ", "Apple Pie", ""))
+        Food.record_logged(get_food_items("APPLE"))
+
+        self.assertEqual(
+            dict(Food.objects.values_list("item_id", "times_logged")),
+            {"apple": 3, "apple pie": 1},
+        )
+
+    def test_search_by_prefix_most_logged_first(self):
+        Food.record_logged(get_food_items("apple", "apple pie", "apple pie", "banana"))
+
+        self.assertEqual(
+            [food.name for food in Food.search("APP")], ["apple pie", "apple"]
+        )
+        self.assertEqual(list(Food.search("pie")), [])
+
+    def test_record_logged_stores_first_logged_nutrients(self):
+        Food.record_logged(get_food_items("Apple", calories=95, protein=0.5, carbs=25))
+        Food.record_logged(get_food_items("apple", calories=200))
+
+        food = Food.objects.get(item_id="apple")
+        self.assertTrue(food.has_details)
+        self.assertEqual(food.times_logged, 2)
+        details = food.to_item_details()["foods"][0]
+        self.assertEqual(details["serving_qty"], 1)
+        self.assertEqual(details["serving_unit"], Food.LOGGED_SERVING_UNIT)
+        self.assertEqual(details["nf_calories"], 95)
+        self.assertEqual(details["nf_protein"], 0.5)
+        self.assertEqual(details["nf_total_carbohydrate"], 25)
+
+    def test_record_logged_keeps_fetched_details(self):
+        Food.update_from_nutritionix("common", "Greek Yogurt", NUTRITIONIX_FOOD)
+        Food.record_logged(get_food_items("greek yogurt", calories=90))
+
+        food = Food.objects.get(item_id="greek yogurt")
+        self.assertEqual(food.times_logged, 1)
+        self.assertEqual(food.calories, 150)
+        self.assertEqual(food.serving_unit, "container")
+
+    def test_update_from_nutritionix(self):
+        Food.record_logged(get_food_items("greek yogurt"))
+        food = Food.update_from_nutritionix("common", "Greek Yogurt", NUTRITIONIX_FOOD)
+
+        self.assertEqual(Food.objects.count(), 1)
+        self.assertTrue(food.has_details)
+        self.assertEqual(food.times_logged, 1)
+        details = food.to_item_details()["foods"][0]
+        self.assertEqual(details["nf_calories"], 150)
+        self.assertEqual(details["nf_total_carbohydrate"], 8)
+        self.assertIsNone(details["photo"]["highres"])
+
+    def test_branded_search_result(self):
+        food = Food.update_from_nutritionix("branded", "nix123", NUTRITIONIX_FOOD)
+
+        self.assertEqual(
+            food.to_search_result(),
+            {
+                "food_name": "Greek Yogurt",
+                "photo": {"thumb": "https://example.com/thumb.jpg"},
+                "brand_name": "Fage",
+                "nf_calories": 150,
+                "nix_item_id": "nix123",
+            },
+        )
+
+    def test_search_result_without_photo(self):
+        Food.record_logged(get_food_items("Apple"))
+
+        self.assertEqual(
+            Food.objects.get(item_id="apple").to_search_result(),
+            {"food_name": "apple"},
+        )
+
+    def test_logged_food_items_are_added(self):
+        user = User.objects.create_user(**CREATE_USER)
+        food_log = FoodLog.objects.create(user=user, date=timezone.localdate())
+        FoodItem.objects.create(
+            log_entry=food_log, name="Oatmeal", calories=150, protein=5, carbs=27, fat=3
+        )
+
+        food = Food.objects.get(item_id="oatmeal")
+        self.assertEqual(food.times_logged, 1)
+        self.assertEqual((food.calories, food.carbs), (150, 27))
@@ -1,54 +1,288 @@
+from django.conf import settings
+from django.core.cache import caches
+from datetime import timedelta
 from django.utils import timezone
-from django.test import TestCase
-from unittest.mock import patch, Mock
-import requests
+from django.test import TestCase, override_settings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 import json
-from nutrition_tracker.services import Nutritionix, FoodLogService
+import threading
+import time
+from unittest.mock import patch
+from nutrition_tracker.models import Food
+from nutrition_tracker.services import (
+    Nutritionix,
+    FoodCatalog,
+    FoodLogService,
+    SingleFlight,
+)
 from users.models import User
 from log.models import FoodItem, FoodLog
+from common.test_utils import get_food_items
+
+
+class NutritionixStubHandler(BaseHTTPRequestHandler):
+    """Stands in for the Nutritionix API, answering with the server's canned responses"""
+
+    protocol_version = "HTTP/1.1"
+
+    def handle_request(self):
+        parsed_url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        self.server.received.append(
+            {
+                "method": self.command,
+                "path": parsed_url.path,
+                "params": parse_qs(parsed_url.query),
+                "body": self.rfile.read(length).decode() if length else "",
+                "headers": dict(self.headers),
+                "client_port": self.client_address[1],
+            }
+        )
+        time.sleep(self.server.delay)
+        status, data = self.server.responses.get(parsed_url.path, (404, {}))
+        body = json.dumps(data).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass  # The client timed out and closed the connection
+
+    do_GET = do_POST = handle_request
+
+    def log_message(self, format, *args):
+        pass
 
 
 class TestNutritionix(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), NutritionixStubHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/v2/"
 
-    @patch("requests.get")
-    def test_search(self, mock_get):
-        # Setup the mock to return a specific response
-        mock_response = Mock()
-        expected_dict = {"items": [{"item_name": "Apple", "calories": 95}]}
-        mock_response.json.return_value = expected_dict
-        mock_response.status_code = 200
-        mock_get.return_value = mock_response
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        caches[settings.NUTRITIONIX_CACHE_ALIAS].clear()
+        self.server.received = []
+        self.server.delay = 0
+        self.server.responses = {
+            "/v2/search/instant/": (200, {"common": [{"food_name": "apple"}]}),
+            "/v2/natural/nutrients/": (200, {"foods": [{"food_name": "banana"}]}),
+            "/v2/search/item/": (200, {"foods": [{"nix_item_id": "12345"}]}),
+        }
+        settings_override = override_settings(NUTRITIONIX_URL=self.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
 
-        # Call the function
+    def test_search(self):
         response = Nutritionix.search("apple")
-        self.assertEqual(response, expected_dict)
 
-        # Ensure the request was called correctly
-        mock_get.assert_called_once_with(
-            "https://trackapi.nutritionix.com/v2/search/instant/",
-            headers=Nutritionix.HEADERS,
-            params={"query": "apple"},
+        self.assertEqual(response, {"common": [{"food_name": "apple"}]})
+        (request,) = self.server.received
+        self.assertEqual(request["method"], "GET")
+        self.assertEqual(request["params"], {"query": ["apple"]})
+        self.assertEqual(request["headers"].get("x-app-key"), Nutritionix.APP_KEY)
+
+    def test_get_item(self):
+        response = Nutritionix.get_item("natural", "banana")
+
+        self.assertEqual(response, {"foods": [{"food_name": "banana"}]})
+        (request,) = self.server.received
+        self.assertEqual(request["method"], "POST")
+        self.assertEqual(json.loads(request["body"]), {"query": "banana"})
+
+    def test_get_branded_item(self):
+        response = Nutritionix.get_item("branded", "12345")
+
+        self.assertEqual(response, {"foods": [{"nix_item_id": "12345"}]})
+        self.assertEqual(self.server.received[0]["params"], {"nix_item_id": ["12345"]})
+
+    def test_responses_are_cached(self):
+        for _ in range(3):
+            Nutritionix.search("apple")
+            Nutritionix.get_item("natural", "banana")
+
+        self.assertEqual(len(self.server.received), 2)
+        Nutritionix.search("apples")
+        self.assertEqual(len(self.server.received), 3)
+
+    def test_leader_reads_response_cached_after_callers_check(self):
+        params = {"query": "apple"}
+        cache_key = Nutritionix.get_cache_key(
+            "GET", "search/instant/", {"params": params}
+        )
+        Nutritionix.search("apple")
+
+        # A caller that missed the cache just before the first leader stored it
+        response = Nutritionix.in_flight.do(
+            cache_key,
+            Nutritionix.request,
+            "GET",
+            "search/instant/",
+            cache_key,
+            params=params,
         )
 
-    @patch("requests.post")
-    def test_get_item(self, mock_post):
-        # Setup the mock to return a specific response
-        mock_response = Mock()
-        expected_dict = {"id": "12345", "name": "Banana"}
-        mock_response.json.return_value = expected_dict
-        mock_response.status_code = 200
-        mock_post.return_value = mock_response
+        self.assertEqual(response, {"common": [{"food_name": "apple"}]})
+        self.assertEqual(len(self.server.received), 1)
 
-        # Call the function
-        response = Nutritionix.get_item("natural", "banana")
-        self.assertEqual(response, expected_dict)
+    def test_error_responses_are_not_cached(self):
+        self.server.responses["/v2/search/instant/"] = (500, {})
+        self.assertIsNone(Nutritionix.search("apple"))
+        self.assertIsNone(Nutritionix.search("apple"))
+        self.assertEqual(len(self.server.received), 2)
+
+    def test_connections_are_reused(self):
+        for query in ["apple", "banana", "cherry"]:
+            Nutritionix.search(query)
+
+        ports = {request["client_port"] for request in self.server.received}
+        self.assertEqual(len(ports), 1)
+
+    def run_concurrently(self, function, count):
+        barrier = threading.Barrier(count)
+        results = [None] * count
+
+        def run(index):
+            barrier.wait()
+            results[index] = function()
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_identical_queries_share_one_request(self):
+        self.server.delay = 0.3
+
+        results = self.run_concurrently(lambda: Nutritionix.search("apple"), 8)
+
+        self.assertEqual(len(self.server.received), 1)
+        self.assertEqual(results, [{"common": [{"food_name": "apple"}]}] * 8)
+
+    def test_concurrent_different_queries_are_not_coalesced(self):
+        self.server.delay = 0.1
+        queries = iter(["apple", "banana", "cherry"])
+        lock = threading.Lock()
 
-        # Ensure the request was called correctly
-        mock_post.assert_called_once_with(
-            "https://trackapi.nutritionix.com/v2/natural/nutrients/",
-            headers=Nutritionix.HEADERS,
-            data=json.dumps({"query": "banana"}),
+        def search():
+            with lock:
+                query = next(queries)
+            return Nutritionix.search(query)
+
+        self.run_concurrently(search, 3)
+        self.assertEqual(len(self.server.received), 3)
+
+    @override_settings(NUTRITIONIX_TIMEOUT=(1, 0.1))
+    def test_slow_response_times_out(self):
+        self.server.delay = 0.5
+
+        started = time.monotonic()
+        self.assertIsNone(Nutritionix.search("apple"))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+
+class TestSingleFlight(TestCase):
+    def test_errors_are_shared_and_key_is_released(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            release.wait()
+            raise ValueError("upstream failed")
+
+        def call():
+            try:
+                single_flight.do("key", fail)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(single_flight.calls, {})
+        self.assertEqual(single_flight.do("key", lambda: 1), 1)
+
+
+class TestFoodCatalog(TestCase):
+    @patch("nutrition_tracker.services.Nutritionix.search")
+    def test_search_answers_locally(self, mock_search):
+        Food.record_logged(get_food_items("Apple", "Apple Pie"))
+
+        results = FoodCatalog.search("apple")
+
+        mock_search.assert_not_called()
+        self.assertEqual(
+            [food["food_name"] for food in results["common"]], ["apple", "apple pie"]
         )
+        self.assertEqual(results["branded"], [])
+
+    @patch("nutrition_tracker.services.Nutritionix.search")
+    def test_search_falls_back_to_nutritionix(self, mock_search):
+        mock_search.return_value = {"common": [], "branded": []}
+        Food.record_logged(get_food_items("Banana"))
+
+        self.assertEqual(FoodCatalog.search("apple"), mock_search.return_value)
+        mock_search.assert_called_once_with("apple")
+
+    @patch("nutrition_tracker.services.Nutritionix.get_item")
+    def test_get_item_serves_logged_food(self, mock_get_item):
+        Food.record_logged(get_food_items("Homemade Chili", calories=300))
+
+        details = FoodCatalog.get_item("common", "Homemade Chili")
+
+        mock_get_item.assert_not_called()
+        self.assertEqual(details["foods"][0]["food_name"], "homemade chili")
+        self.assertEqual(details["foods"][0]["nf_calories"], 300)
+
+    @patch("nutrition_tracker.services.Nutritionix.get_item")
+    def test_get_item_is_stored_in_catalog(self, mock_get_item):
+        mock_get_item.return_value = {
+            "foods": [
+                {
+                    "food_name": "apple",
+                    "serving_qty": 1,
+                    "serving_unit": "medium",
+                    "nf_calories": 95,
+                    "nf_protein": 0.5,
+                    "nf_total_carbohydrate": 25,
+                    "nf_total_fat": 0.3,
+                    "photo": {"thumb": None, "highres": None},
+                }
+            ]
+        }
+
+        self.assertEqual(
+            FoodCatalog.get_item("common", "Apple"), mock_get_item.return_value
+        )
+        details = FoodCatalog.get_item("common", "apple")
+
+        mock_get_item.assert_called_once_with("common", "Apple")
+        self.assertEqual(details["foods"][0]["nf_calories"], 95)
 
 
 class TestFoodLogService(TestCase):
@@ -80,3 +314,42 @@ class TestFoodLogService(TestCase):
         self.assertEqual(summary["avg_protein"], 0.3)
         self.assertEqual(summary["avg_carbs"], 25)
         self.assertEqual(summary["avg_fat"], 0.2)
+
+    def test_get_user_food_summary_groups_days_in_one_query(self):
+        today = timezone.localdate()
+        log = FoodLog.objects.create(user=self.user, date=today - timedelta(days=2))
+        for calories in [300, 200]:
+            FoodItem.objects.create(
+                log_entry=log,
+                name="Rice",
+                calories=calories,
+                protein=5,
+                carbs=40,
+                fat=1,
+            )
+        FoodLog.objects.create(user=self.user, date=today - timedelta(days=3))
+        FoodLog.objects.create(user=self.user, date=today - timedelta(days=10))
+
+        with self.assertNumQueries(1):
+            summary = FoodLogService.get_user_food_summary(self.user)
+
+        self.assertEqual(
+            summary["bar_graph_data"],
+            {
+                "dates": [today - timedelta(days=3), today - timedelta(days=2), today],
+                "Calories": [0, 500, 95],
+            },
+        )
+        self.assertEqual(summary["avg_calories"], round(595 / 3))
+        self.assertEqual(summary["pie_chart_data"], [10.3, 105, 2.2])
+
+    def test_get_user_food_summary_for_month(self):
+        FoodLog.objects.create(
+            user=self.user, date=timezone.localdate() - timedelta(days=20)
+        )
+
+        week = FoodLogService.get_user_food_summary(self.user, "week")
+        month = FoodLogService.get_user_food_summary(self.user, "month")
+
+        self.assertEqual(len(week["bar_graph_data"]["dates"]), 1)
+        self.assertEqual(len(month["bar_graph_data"]["dates"]), 2)
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
@@ -5,7 +6,9 @@ from rest_framework import status
 from unittest.mock import patch
 
 from common.common_utils import is_base64
+from nutrition_tracker.models import Food
 from users.models import User
+from common.test_utils import get_food_items
 
 
 class TestNutritionTrackerView(TestCase):
@@ -110,16 +113,21 @@ class TestFetchNutritionSummaryAPIView(APITestCase):
                 "bar_graph_data": [100, 200, 300],
                 "pie_chart": "Pie chart image data",
                 "bar_chart": "Graph image data",
+                "mime_type": "image/webp",
             },
         )
 
         # Check that mocks were called correctly
-        mock_get_summary.assert_called_once_with(self.user)
+        mock_get_summary.assert_called_once_with(self.user, "week")
         mock_plot_graph.assert_called_once_with()
         mock_plot_pie_chart.assert_called_once_with(
-            ["Protein", "Carbs", "Fat"], ["30%", "50%", "20%"]
+            ["Protein", "Carbs", "Fat"], ["30%", "50%", "20%"], "webp"
         )
 
+    def test_unsupported_period(self):
+        response = self.client.get(reverse("get_nutrition_summary", args=["decade"]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     @patch("nutrition_tracker.views.FoodLogService.get_user_food_summary")
     def test_no_data_available(self, mock_get_summary):
         mock_get_summary.return_value = {
@@ -130,3 +138,111 @@ class TestFetchNutritionSummaryAPIView(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(is_base64(response.data["bar_chart"]))
+
+    @patch("nutrition_tracker.views.FoodLogService.get_user_food_summary")
+    @patch("nutrition_tracker.views.Graph.plot_pie_chart")
+    @patch("nutrition_tracker.views.Graph.plot_graph")
+    def test_image_type(self, mock_plot_graph, mock_plot_pie_chart, mock_summary):
+        mock_summary.return_value = {
+            "bar_graph_data": {"dates": [], "Calories": []},
+            "pie_chart_data": [10, 20, 30],
+        }
+        mock_plot_graph.return_value = "Graph image data"
+        mock_plot_pie_chart.return_value = "Pie chart image data"
+
+        response = self.client.get(self.url, {"image": "svg"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["mime_type"], "image/svg+xml")
+        mock_plot_pie_chart.assert_called_once_with(
+            ["Protein", "Carbs", "Fat"], [10, 20, 30], "svg"
+        )
+
+    @patch("nutrition_tracker.views.Graph.plot_pie_chart")
+    @patch("nutrition_tracker.views.Graph.plot_graph")
+    def test_series_format(self, mock_plot_graph, mock_plot_pie_chart):
+        response = self.client.get(self.url, {"format": "series"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["bar_chart"]["dates"]), 7)
+        self.assertEqual(response.data["bar_chart"]["Calories"], [0] * 7)
+        self.assertNotIn("pie_chart", response.data)
+        mock_plot_graph.assert_not_called()
+        mock_plot_pie_chart.assert_not_called()
+
+    @patch("nutrition_tracker.views.FoodLogService.get_user_food_summary")
+    @patch("nutrition_tracker.views.Graph.submit_pie_chart")
+    @patch("nutrition_tracker.views.Graph.submit_graph")
+    def test_async_format(self, mock_submit_graph, mock_submit_pie_chart, mock_summary):
+        mock_summary.return_value = {
+            "bar_graph_data": {"dates": [], "Calories": []},
+            "pie_chart_data": [10, 20, 30],
+        }
+        mock_submit_graph.return_value = {"job_id": "bar", "status": "pending"}
+        mock_submit_pie_chart.return_value = {"job_id": "pie", "status": "pending"}
+
+        response = self.client.get(self.url, {"format": "async"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["bar_chart"]["job_id"], "bar")
+        self.assertEqual(response.data["pie_chart"]["job_id"], "pie")
+        mock_submit_pie_chart.assert_called_once_with(
+            ["Protein", "Carbs", "Fat"], [10, 20, 30], "webp"
+        )
+
+
+class TestFoodSearchAPIView(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="user", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("food_search")
+
+    @patch("nutrition_tracker.services.Nutritionix.search")
+    def test_search_is_answered_from_prefix_cache(self, mock_search):
+        Food.record_logged(get_food_items("Chicken Breast", "Chickpeas", "Chia Seeds"))
+
+        response = self.client.get(self.url, {"q": "chi", "seq": 1})
+        self.assertEqual(response.data["seq"], 1)
+        self.assertEqual(len(response.data["results"]["common"]), 3)
+
+        Food.objects.all().delete()
+        response = self.client.get(self.url, {"q": "Chick", "seq": 2})
+        self.assertEqual(
+            [food["food_name"] for food in response.data["results"]["common"]],
+            ["chicken breast", "chickpeas"],
+        )
+        mock_search.assert_not_called()
+
+    @patch("nutrition_tracker.services.Nutritionix.search")
+    def test_prefix_without_local_matches_searches_nutritionix(self, mock_search):
+        mock_search.return_value = {"common": [{"food_name": "chickpea"}]}
+        Food.record_logged(get_food_items("Chicken Breast", "Chia Seeds"))
+        self.client.get(self.url, {"q": "chi", "seq": 1})
+
+        response = self.client.get(self.url, {"q": "chickp", "seq": 2})
+
+        self.assertEqual(response.data["results"], mock_search.return_value)
+        mock_search.assert_called_once_with("chickp")
+
+    @patch("nutrition_tracker.services.Nutritionix.search")
+    def test_short_query_is_not_searched(self, mock_search):
+        response = self.client.get(self.url, {"q": "ch"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], {})
+        mock_search.assert_not_called()
+
+    @patch("nutrition_tracker.services.Nutritionix.search")
+    def test_older_request_is_stale(self, mock_search):
+        mock_search.return_value = {"common": [], "branded": []}
+        self.client.get(self.url, {"q": "chicken", "seq": 5})
+
+        response = self.client.get(self.url, {"q": "chick", "seq": 4})
+
+        self.assertTrue(response.data["stale"])
+        mock_search.assert_called_once_with("chicken")
+
+    def test_invalid_seq(self):
+        response = self.client.get(self.url, {"q": "chicken", "seq": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
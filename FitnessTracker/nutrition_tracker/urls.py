@@ -8,6 +8,7 @@ urlpatterns = [
         views.FetchNutritionSearchAPIView.as_view(),
         name="get_search_results",
     ),
+    path("search/", views.FoodSearchAPIView.as_view(), name="food_search"),
     path(
         "get_item_details/<str:item_type>/<str:item_id>",
         views.FetchItemDetailsAPIView.as_view(),
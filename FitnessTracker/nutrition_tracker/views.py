@@ -1,4 +1,3 @@
-from datetime import timedelta
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import render
 from django.views.generic import TemplateView
@@ -6,10 +5,10 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
-from .services import Nutritionix, FoodLogService
+from .services import FoodCatalog, FoodLogService, SUMMARY_PERIOD_DAYS, food_search
 from django.utils import timezone
 from common.common_utils import Graph
-from common.base import BaseTemplateView
+from common.base import BaseTemplateView, BaseGraphAPIView, BaseSearchAPIView
 
 
 # Create your views here.
@@ -37,32 +36,64 @@ class FetchNutritionSearchAPIView(APIView):
 
     def get(self, request, *args, **kwargs):
         query = kwargs["query"].lower()
-        data = Nutritionix.search(query)
+        data = FoodCatalog.search(query)
         return Response(data=data, status=status.HTTP_200_OK)
 
 
+class FoodSearchAPIView(BaseSearchAPIView):
+    """Type-ahead food search answered from the prefix cache, local catalog or Nutritionix"""
+
+    def get_prefix_search(self):
+        return food_search
+
+
 class FetchItemDetailsAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
         item_type = kwargs["item_type"]
         item_id = kwargs["item_id"]
-        data = Nutritionix.get_item(item_type, item_id)
+        data = FoodCatalog.get_item(item_type, item_id)
         return Response(data=data, status=status.HTTP_200_OK)
 
 
-class FetchNutritionSummaryAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+class FetchNutritionSummaryAPIView(BaseGraphAPIView):
+    image_type = Graph.WEBP
 
     def get(self, request, *args, **kwargs):
-        user_summary = FoodLogService.get_user_food_summary(request.user)
+        period = kwargs["period"]
+        if period not in SUMMARY_PERIOD_DAYS:
+            return Response(
+                data={"detail": f"Unsupported period: {period}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user_summary = FoodLogService.get_user_food_summary(request.user, period)
         end = timezone.localdate()
-        start = end - timedelta(days=6)
-        user_summary["bar_chart"] = Graph(
-            user_summary["bar_graph_data"], "Calories", "bar", start, end
-        ).plot_graph()
+        start = FoodLogService.get_period_start(end, period)
+        image_type = self.get_image_type()
+        user_summary["mime_type"] = Graph.MIME_TYPES[image_type]
+        graph = Graph(
+            user_summary["bar_graph_data"], "Calories", "bar", start, end, image_type
+        )
+        graph_format = self.get_graph_format()
+        if graph_format == Graph.SERIES_FORMAT:
+            # Pie chart data is already part of the summary, clients draw both charts
+            user_summary["bar_chart"] = graph.get_series()
+            return Response(data=user_summary, status=status.HTTP_200_OK)
+        if graph_format == Graph.ASYNC_FORMAT:
+            user_summary["bar_chart"] = graph.submit_graph()
+            if user_summary["pie_chart_data"]:
+                user_summary["pie_chart"] = Graph.submit_pie_chart(
+                    ["Protein", "Carbs", "Fat"],
+                    user_summary["pie_chart_data"],
+                    image_type,
+                )
+            return Response(data=user_summary, status=status.HTTP_200_OK)
+
+        user_summary["bar_chart"] = graph.plot_graph()
         if user_summary["pie_chart_data"]:
             user_summary["pie_chart"] = Graph.plot_pie_chart(
-                ["Protein", "Carbs", "Fat"], user_summary["pie_chart_data"]
+                ["Protein", "Carbs", "Fat"], user_summary["pie_chart_data"], image_type
             )
         return Response(data=user_summary, status=status.HTTP_200_OK)
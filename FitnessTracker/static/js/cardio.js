@@ -215,7 +215,11 @@ class CardioManager {
 
   updateCardioSummaries(selectedRange) {
     this.getSummaries(selectedRange).then((response) => {
-      pageManager.updateGraph(response["graph"], "cardio-chart");
+      pageManager.updateGraph(
+        response["graph"],
+        "cardio-chart",
+        response["mime_type"]
+      );
       this.updateSummaryContainers(selectedRange, response);
     });
   }
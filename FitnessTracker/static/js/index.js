@@ -359,18 +359,18 @@ class PageManager {
     return elementTemplate.content.firstChild;
   }
 
-  updateGraph(graph, containerID) {
-    const graphImg = this.createGraphImg(graph);
+  updateGraph(graph, containerID, mimeType = "image/png") {
+    const graphImg = this.createGraphImg(graph, mimeType);
     const graphContainer = document.getElementById(containerID);
 
     graphContainer.innerHTML = "";
     graphContainer.appendChild(graphImg);
   }
 
-  createGraphImg(base64Graph) {
+  createGraphImg(base64Graph, mimeType = "image/png") {
     if (base64Graph) {
       const img = document.createElement("img");
-      img.src = "data:image/png;base64," + base64Graph;
+      img.src = `data:${mimeType};base64,` + base64Graph;
       return img;
     } else {
       const div = document.createElement("div");
@@ -23,12 +23,19 @@ class NutritionManager {
   }
 
   getNutritionSummarySuccessHandler = (response) => {
-    const pieChart = this.createGraphImg(response["pie_chart"]);
+    const pieChart = pageManager.createGraphImg(
+      response["pie_chart"],
+      response["mime_type"]
+    );
     const pieChartContainer = document.getElementById("pie-chart");
     pieChartContainer.innerHTML = "";
     pieChartContainer.appendChild(pieChart);
 
-    pageManager.updateGraph(response["bar_chart"], "bar-chart");
+    pageManager.updateGraph(
+      response["bar_chart"],
+      "bar-chart",
+      response["mime_type"]
+    );
 
     const proteinContainer = document.querySelector(".avg-protein");
     proteinContainer.textContent = response["avg_protein"]
@@ -182,18 +189,6 @@ class NutritionManager {
     totalCarbs.textContent = carbs;
     totalFat.textContent = fat;
   }
-
-  createGraphImg(base64Graph) {
-    if (base64Graph) {
-      const img = document.createElement("img");
-      img.src = "data:image/png;base64," + base64Graph;
-      return img;
-    } else {
-      const div = document.createElement("div");
-      div.textContent = "No Chart To Display";
-      return div;
-    }
-  }
 }
 
 window.nutritionManager = new NutritionManager();
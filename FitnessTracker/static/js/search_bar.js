@@ -53,14 +53,21 @@ class SearchBar {
   };
 
   fetchSearchRequest(query) {
+    // Timestamps keep sequence ids increasing across page loads
+    const seq = Date.now();
+    this.searchSeq = seq;
     pageManager
       .fetchData({
-        url: `${pageManager.baseURL}/nutrition/get_search_results/${query}`,
+        url: `${pageManager.baseURL}/nutrition/search/?q=${encodeURIComponent(query)}&seq=${seq}`,
         method: "GET",
         responseType: "json",
       })
       .then((response) => {
-        this.searchResults = response;
+        // Drop responses to queries the user has already typed past
+        if (response.stale || response.seq !== this.searchSeq) {
+          return;
+        }
+        this.searchResults = response.results;
         this.updateSearchResultsList();
       });
   }
@@ -95,7 +102,9 @@ class SearchBar {
       );
 
       const itemImg = document.createElement("img");
-      itemImg.src = result["photo"]["thumb"];
+      if (result["photo"] && result["photo"]["thumb"]) {
+        itemImg.src = result["photo"]["thumb"];
+      }
       itemImg.style.maxHeight = "2rem";
 
       const contentContainer = document.createElement("div");
@@ -135,7 +144,9 @@ class SearchBar {
         resultContainer.dataset.id = result["food_name"];
       }
 
-      resultContainer.appendChild(itemImg);
+      if (itemImg.src) {
+        resultContainer.appendChild(itemImg);
+      }
       resultContainer.appendChild(contentContainer);
 
       this.searchResultList.appendChild(resultContainer);
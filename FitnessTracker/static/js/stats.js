@@ -23,7 +23,11 @@ class StatsManager {
       url: `${this.baseURL}/${graphSettings["stat"]}/${graphSettings["dateRange"]}`,
       method: "GET",
       successHandler: (response) => {
-        pageManager.updateGraph(response["graph"], "graph");
+        pageManager.updateGraph(
+          response["graph"],
+          "graph",
+          response["mime_type"]
+        );
       },
       errorHandler: {},
     });
@@ -44,8 +44,11 @@ def get_graph_data(user, stat, start, end):
         return get_exercise_graph_data(graph_data, stat, user, start, end)
 
 
-def get_graph(user, stat, months):
+def get_graph(
+    user, stat, months, graph_format=Graph.IMAGE_FORMAT, image_type=Graph.PNG
+):
     start = timezone.localdate() - relativedelta(months=months)
     end = timezone.localdate()
     graph_data = get_graph_data(user, stat, start, end)
-    return Graph(graph_data, "Weight", "line").plot_graph()
+    graph = Graph(graph_data, "Weight", "line", image_type=image_type)
+    return graph.get_graph(graph_format)
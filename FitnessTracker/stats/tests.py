@@ -1,3 +1,59 @@
+import base64
+from datetime import timedelta
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from common.common_utils import is_base64
+from log.models import WeightLog
+from users.models import User
 
-# Create your tests here.
+
+class TestStatsGraphAPIView(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("stats_graph", kwargs={"stat": "body-weight", "range": 1})
+        self.today = timezone.localdate()
+        WeightLog.objects.create(
+            user=self.user,
+            date=self.today - timedelta(days=2),
+            body_weight=150,
+            body_fat=20,
+        )
+
+    def test_graph_image(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(is_base64(response.data["graph"]))
+
+    def test_graph_series(self):
+        response = self.client.get(self.url, {"format": "series"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDictEqual(
+            response.data["graph"],
+            {
+                "dates": [(self.today - timedelta(days=2)).strftime("%Y-%m-%d")],
+                "Weight": [150.0],
+            },
+        )
+
+    def test_graph_image_type(self):
+        response = self.client.get(self.url, {"image": "svg"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(base64.b64decode(response.data["graph"]).startswith(b"<?xml"))
+        self.assertEqual(response.data["mime_type"], "image/svg+xml")
+
+    def test_graph_png_image_type(self):
+        response = self.client.get(self.url, {"image": "png"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(base64.b64decode(response.data["graph"]).startswith(b"\x89PNG"))
+        self.assertEqual(response.data["mime_type"], "image/png")
+
+    def test_graph_invalid_image_type_uses_default(self):
+        response = self.client.get(self.url, {"image": "gif"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(base64.b64decode(response.data["graph"]).startswith(b"<?xml"))
+        self.assertEqual(response.data["mime_type"], "image/svg+xml")
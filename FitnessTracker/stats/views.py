@@ -1,6 +1,6 @@
-from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from common.base import BaseGraphAPIView
+from common.common_utils import Graph
 from stats.services import get_graph
 from workout.base import ExerciseTemplateView
 
@@ -11,13 +11,20 @@ class StatsView(ExerciseTemplateView):
     fetch_template_name = "stats/stats.html"
 
 
-class StatsGraphAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+class StatsGraphAPIView(BaseGraphAPIView):
+    # The line graph is smallest as SVG
+    image_type = Graph.SVG
 
     def get(self, request, *args, **kwargs):
         months = int(kwargs.get("range"))
         stat = kwargs.get("stat")
 
-        graph = get_graph(request.user, stat, months)
+        graph = get_graph(
+            request.user,
+            stat,
+            months,
+            self.get_graph_format(),
+            self.get_image_type(),
+        )
 
-        return Response(data={"graph": graph})
+        return Response(data={"graph": graph, "mime_type": self.get_mime_type()})
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_usersettings_modules"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usersettings",
+            name="latest_weight_log_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -69,6 +69,8 @@ class UserSettings(models.Model):
     age = models.PositiveIntegerField(
         default=30, validators=[MinValueValidator(1), MaxValueValidator(120)]
     )
+    # Date of the weight log body_weight and body_fat were taken from, None if unknown
+    latest_weight_log_date = models.DateField(null=True, blank=True)
 
     modules = models.JSONField(default=default_modules)
 
@@ -76,7 +78,7 @@ class UserSettings(models.Model):
         verbose_name_plural = "User Settings"
 
     @classmethod
-    def update(cls, user, body_weight, body_fat):
+    def update(cls, user, body_weight, body_fat, latest_weight_log_date=None):
         """
         Updates the user's body weight and body fat settings and refreshes the cache.
 
@@ -84,6 +86,7 @@ class UserSettings(models.Model):
         user (User): The user object whose settings are to be updated.
         body_weight (float): The new body weight to set.
         body_fat (float): The new body fat percentage to set.
+        latest_weight_log_date (date): The date of the weight log the values are from.
 
         Returns:
         None
@@ -92,9 +95,11 @@ class UserSettings(models.Model):
         if (
             user_settings.body_weight != body_weight
             or user_settings.body_fat != body_fat
+            or user_settings.latest_weight_log_date != latest_weight_log_date
         ):
             user_settings.body_weight = body_weight
             user_settings.body_fat = body_fat
+            user_settings.latest_weight_log_date = latest_weight_log_date
             user_settings.save()
 
     @property
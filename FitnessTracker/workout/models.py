@@ -4,7 +4,11 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Q, Case, When, OuterRef, Subquery
 from django.db import models
 from django.utils import timezone
-from common.common_utils import get_user_model_or_default, clone_for_user
+from common.common_utils import (
+    get_user_model_or_default,
+    get_user_models_by_name,
+    clone_for_user,
+)
 from users.models import User
 
 
@@ -102,10 +106,19 @@ class Exercise(models.Model):
             exercise = clone_for_user(exercise, user)
         return exercise
 
-    def update_five_rep_max(self, weight, reps):
+    @classmethod
+    def get_exercises(cls, user, exercise_names):
+        # Bulk version of get_exercise, returns a name to exercise map
+        return get_user_models_by_name(user, cls, exercise_names)
+
+    @staticmethod
+    def calculate_five_rep_max(weight, reps):
         one_rep_max = weight * (1 + (reps / 30))
         five_rep_max = one_rep_max / (1 + (5 / 30))
-        five_rep_max = round(five_rep_max * 4) / 4
+        return round(five_rep_max * 4) / 4
+
+    def update_five_rep_max(self, weight, reps):
+        five_rep_max = self.calculate_five_rep_max(weight, reps)
 
         if five_rep_max > self.five_rep_max:
             self.five_rep_max = five_rep_max
@@ -152,6 +165,11 @@ class Workout(models.Model):
             workout = clone_for_user(workout, user)
         return workout
 
+    @classmethod
+    def get_workouts(cls, user, workout_names):
+        # Bulk version of get_workout, returns a name to workout map
+        return get_user_models_by_name(user, cls, workout_names)
+
 
 class WorkoutSettings(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -28,9 +28,11 @@ class DaySerializer(serializers.ModelSerializer):
         DayWorkout.objects.filter(day=day).delete()
 
         # Create new DayWorkout instances for each workout
-        for i, workout_name in enumerate(workouts_data):
-            workout, _ = Workout.objects.get_or_create(name=workout_name, user=user)
-            DayWorkout.objects.create(day=day, workout=workout, order=i)
+        workouts = Workout.get_workouts(user, workouts_data)
+        DayWorkout.objects.bulk_create(
+            DayWorkout(day=day, workout=workouts[workout_name], order=i)
+            for i, workout_name in enumerate(workouts_data)
+        )
         return day
 
     def to_representation(self, instance):
@@ -67,6 +69,15 @@ class RoutineSerializer(serializers.ModelSerializer):
         routine, _ = Routine.objects.get_or_create(
             name=name, user=user, defaults=validated_data
         )
+        workouts = Workout.get_workouts(
+            user,
+            [
+                workout_name
+                for week_data in weeks_data
+                for day_data in week_data["days"]
+                for workout_name in day_data["workouts"]
+            ],
+        )
         for week_data in weeks_data:
             week_number = week_data.get("week_number")
             days_data = week_data.pop("days")
@@ -80,11 +91,9 @@ class RoutineSerializer(serializers.ModelSerializer):
                     week=week, day_number=day_number, defaults={**day_data}
                 )
                 DayWorkout.objects.filter(day=day).delete()
-                for workout_name in workouts_data:
-                    workout = Workout.get_workout(
-                        workout_name=workout_name, user=self.context["request"].user
-                    )
-                    day.workouts.add(workout.id)
+                day.workouts.add(
+                    *[workouts[workout_name].id for workout_name in workouts_data]
+                )
         return routine
 
 
@@ -78,6 +78,26 @@ class TestExerciseModel(TestCase):
         exercise = Exercise.get_exercise(user=self.user, exercise_name=" lat pulldown ")
         self.assertEqual(exercise.name, "Lat Pulldown")
 
+    def test_get_exercises_resolves_in_bulk(self):
+        cache.clear()
+        default_user = User.get_default_user()
+        Exercise.objects.create(user=self.user, name="Squat")
+        Exercise.objects.create(user=default_user, name="Squat")
+        Exercise.objects.create(user=default_user, name="Deadlift", five_rep_max=200)
+
+        # One lookup, one bulk insert for the clone and the new exercise
+        with self.assertNumQueries(2):
+            exercises = Exercise.get_exercises(
+                self.user, ["squat", " deadlift", "Front Squat", "squat"]
+            )
+
+        self.assertEqual(exercises["squat"].user, self.user)
+        self.assertEqual(exercises[" deadlift"].user, self.user)
+        self.assertEqual(exercises[" deadlift"].five_rep_max, 200)
+        self.assertEqual(exercises["Front Squat"].name, "Front Squat")
+        self.assertEqual(Exercise.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Exercise.objects.filter(user=default_user).count(), 2)
+
     def test_update_five_rep_max_successful(self):
         exercise = Exercise.objects.create(
             user=self.user, name="Leg Press", five_rep_max=180
@@ -182,6 +202,22 @@ class TestWorkoutModel(TestCase):
         self.assertEqual(default_workout.name, "Cardio Day")
         self.assertIsNotNone(default_workout)
 
+    def test_get_workouts_clones_default_workouts(self):
+        default_user = User.get_default_user()
+        default_workout = Workout.objects.create(user=default_user, name="Push Day")
+        default_workout.exercises.add(self.exercise2)
+
+        workouts = Workout.get_workouts(self.user, ["leg day", "push day", "Pull Day"])
+
+        self.assertEqual(workouts["leg day"], self.workout)
+        self.assertEqual(workouts["push day"].user, self.user)
+        self.assertNotEqual(workouts["push day"].pk, default_workout.pk)
+        self.assertEqual(list(workouts["push day"].exercises.all()), [self.exercise2])
+        self.assertEqual(workouts["Pull Day"].name, "Pull Day")
+        self.assertTrue(
+            Workout.objects.filter(user=self.user, name="Pull Day").exists()
+        )
+
 
 class WorkoutSettingsModelTest(TestCase):
     @classmethod
@@ -48,10 +48,12 @@ class WorkoutViewSet(BaseOwnerViewSet):
 
     def perform_create(self, serializer):
         instance = serializer.save(user=self.request.user)
+        exercises = Exercise.get_exercises(
+            self.request.user, [exercise["name"] for exercise in instance.config]
+        )
         for exercise in instance.config:
-            obj = Exercise.objects.get(name=exercise["name"], user=self.request.user)
-            obj.five_rep_max = exercise["five_rep_max"]
-            obj.save()
+            exercises[exercise["name"]].five_rep_max = exercise["five_rep_max"]
+        Exercise.objects.bulk_update(set(exercises.values()), ["five_rep_max"])
 
 
 class WorkoutSettingsView(WorkoutTemplateView):